@@ -1,11 +1,20 @@
+import contextlib
+
 import click
 
 from ns_controller.client import NsControllerClient
 from ns_controller.pb.ns_controller_pb2 import Button
 from ns_controller.server import DEFAULT_HOST, DEFAULT_PORT
+from ns_shiny_hunter.audio import AlsaSource, AudioDetector
+from ns_shiny_hunter.clips import ClipRecorder
+from ns_shiny_hunter.frame import change_gate_stats
 from ns_shiny_hunter.frame_grabber import FrameGrabber
 from ns_shiny_hunter.legends_za.scripts.bench_reset.script import BenchReset
 from ns_shiny_hunter.legends_za.scripts.wz5.script import WildZone5
+from ns_shiny_hunter.legends_za.shiny import LEGENDS_ZA_SHINY_INDICATORS
+from ns_shiny_hunter.replay import ReplayCapture
+from ns_shiny_hunter.shiny import ShinyDetection, ShinyDetector
+from ns_shiny_hunter.telemetry import Telemetry
 
 
 @click.command()
@@ -13,17 +22,70 @@ from ns_shiny_hunter.legends_za.scripts.wz5.script import WildZone5
 @click.option("--port", default=DEFAULT_PORT, type=int, help="Server port")
 @click.option("--source", type=int, default=0, help="Video source index")
 @click.option("--resets", default=1, type=int)
-def main(host: str, port: int, source: int, resets: int) -> None:
-    client = NsControllerClient(host, port)
+@click.option("--trace", type=click.Path(dir_okay=False), default=None, help="Record sent inputs to a trace file")
+@click.option("--replay", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Play a recorded capture instead of the video source")
+@click.option("--speed", default=1.0, type=float, help="Replay speed multiplier (0 for as fast as possible)")
+@click.option("--loop", is_flag=True, help="Loop the replayed recording")
+@click.option("--detect-shiny", is_flag=True,
+              help="Stop the script when the screen shows a shiny "
+                   "(experimental: calibrated on non-shiny captures only)")
+@click.option("--detect-sound", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Stop the script when the capture card's audio plays this WAV clip (e.g. the shiny chime)")
+@click.option("--audio-device", default="default", help="ALSA capture device for --detect-sound")
+@click.option("--audio-rate", default=48000, type=int, help="ALSA sample rate (must match the --detect-sound clip)")
+@click.option("--clip-seconds", default=0.0, type=float,
+              help="With --detect-shiny or --detect-sound, save a clip of this many seconds around a detected shiny "
+                   "(0 to disable)")
+@click.option("--telemetry", "telemetry_path", type=click.Path(dir_okay=False), default=None,
+              help="Record per-state timings and resets to a telemetry file")
+def main(host: str, port: int, source: int, resets: int, trace: str | None,
+         replay: str | None, speed: float, loop: bool, detect_shiny: bool, detect_sound: str | None,
+         audio_device: str, audio_rate: int, clip_seconds: float, telemetry_path: str | None) -> None:
+    audio_source = None
+    if detect_sound is not None:
+        try:
+            audio_source = AlsaSource(audio_device, audio_rate)
+        except RuntimeError as e:
+            raise click.UsageError(str(e)) from e
+    client = NsControllerClient(host, port, trace_path=trace)
     try:
-        with FrameGrabber(source) as frame_grabber:
+        with contextlib.ExitStack() as stack:
+            # clips buffer the device's JPEG bytes rather than copies of every decoded frame
+            detecting = detect_shiny or audio_source is not None
+            frame_grabber = stack.enter_context(FrameGrabber(ReplayCapture(replay, speed, loop) if replay else source,
+                                                             lazy_decode=detecting and clip_seconds > 0))
+            shiny_detector = None
+            if detecting:
+                # without --detect-shiny the detector watches no indicators and only relays sound matches
+                indicators = LEGENDS_ZA_SHINY_INDICATORS if detect_shiny else ()
+                shiny_detector = stack.enter_context(ShinyDetector(frame_grabber, indicators))
+            if audio_source is not None:
+                audio_detector = stack.enter_context(AudioDetector(audio_source, detect_sound))
+                audio_detector.on_detect(lambda detection: shiny_detector.report(
+                    ShinyDetection("sound", frame_grabber.seq, detection.timestamp, detection.score)))
+            if shiny_detector is not None and clip_seconds > 0:
+                clip_recorder = stack.enter_context(ClipRecorder(frame_grabber, clip_seconds))
+                shiny_detector.on_detect(lambda detection: clip_recorder.trigger(after=clip_seconds / 2))
+            telemetry = stack.enter_context(Telemetry(telemetry_path, inputs=lambda: client.inputs))
             pair_controller(client)
-            script = BenchReset(frame_grabber, client, resets=resets)
+            script = BenchReset(frame_grabber, client, resets=resets, shiny_detector=shiny_detector,
+                                telemetry=telemetry)
             # script = SushiHighRoller(frame_grabber, client, state=State.ENTRANCE_1)
-            # script = WildZone5(frame_grabber, client, resets=resets)
+            # script = WildZone5(frame_grabber, client, resets=resets, shiny_detector=shiny_detector)
             script.run()
+            for line in telemetry.report():
+                print(line)
     finally:
         open_controller_menu(client)
+        client.close()
+        print_change_gate_stats()
+
+
+def print_change_gate_stats():
+    for name, stats in change_gate_stats().items():
+        if stats["checks"]:
+            print(f"{name}: skipped {stats['skips']}/{stats['checks']} matches ({stats['skip_rate']:.0%})")
 
 
 def pair_controller(client: NsControllerClient):
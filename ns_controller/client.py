@@ -4,13 +4,23 @@ import grpc
 
 from ns_controller.pb.ns_controller_pb2 import ControllerState, Button
 from ns_controller.pb.ns_controller_pb2_grpc import NsControllerStub
+from ns_controller.trace import TraceRecord, TraceWriter
 
 
 class NsControllerClient:
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(self, host: str, port: int, trace_path: str | None = None) -> None:
+        """
+        Args:
+            host: Server host
+            port: Server port
+            trace_path: Optional file to record every sent state (with timestamp and RPC latency) to
+        """
         self.current_state = ControllerState(buttons=0)
+        # states sent so far
+        self.inputs = 0
         self.channel = grpc.insecure_channel(f"{host}:{port}")
         self.stub = NsControllerStub(self.channel)
+        self.trace_writer = TraceWriter(trace_path) if trace_path else None
 
     def _update_buttons(self, *buttons: Button, pressed: bool) -> None:
         """
@@ -28,7 +38,12 @@ class NsControllerClient:
     def send(self, debug: bool = False):
         if debug:
             print_state(self.current_state)
+        start_ns = time.monotonic_ns()
         self.stub.SetState(self.current_state)
+        self.inputs += 1
+        if self.trace_writer is not None:
+            latency_ns = time.monotonic_ns() - start_ns
+            self.trace_writer.append(TraceRecord.from_state(self.current_state, start_ns, latency_ns))
 
     def press(self, *buttons: Button, send: bool = True, post_delay: float | None = 0.1) -> None:
         """
@@ -157,8 +172,10 @@ class NsControllerClient:
             time.sleep(post_delay)
 
     def close(self):
-        """Close the gRPC channel."""
+        """Close the gRPC channel and flush the trace, if any."""
         self.channel.close()
+        if self.trace_writer is not None:
+            self.trace_writer.close()
 
 
 def print_state(state: ControllerState):
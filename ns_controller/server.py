@@ -27,9 +27,15 @@ class NsControllerServicerImpl(NsControllerServicer):
         )
 
     def StreamState(self, request_iterator, context):
-        # Implement your logic to handle StreamState requests here
+        # client-streaming RPC: apply every state as it arrives, then answer once with
+        # the state the controller was in before the stream started
+        previous_state = self.controller.state
         for request in request_iterator:
-            yield self.SetState(request, context)
+            self.controller.state = request
+        return Ack(
+            success=True,
+            previous_state=previous_state
+        )
 
 
 @click.command()
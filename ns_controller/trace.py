@@ -0,0 +1,146 @@
+import queue
+import struct
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO, Final, NamedTuple
+
+from loguru import logger
+
+from ns_controller.pb.ns_controller_pb2 import ControllerState, Stick
+
+MAGIC: Final = b"NSCT"
+VERSION: Final = 1
+
+# magic, version
+HEADER: Final = struct.Struct("<4sB")
+# timestamp_ns, latency_ns, buttons, ls.x, ls.y, rs.x, rs.y
+RECORD: Final = struct.Struct("<qIQffff")
+
+MAX_LATENCY_NS: Final = 0xFFFFFFFF
+
+
+class TraceRecord(NamedTuple):
+    timestamp_ns: int
+    latency_ns: int
+    buttons: int
+    ls_x: float
+    ls_y: float
+    rs_x: float
+    rs_y: float
+
+    @classmethod
+    def from_state(cls, state: ControllerState, timestamp_ns: int, latency_ns: int) -> 'TraceRecord':
+        return cls(timestamp_ns, min(latency_ns, MAX_LATENCY_NS), state.buttons,
+                   state.ls.x, state.ls.y, state.rs.x, state.rs.y)
+
+    def to_state(self) -> ControllerState:
+        return ControllerState(
+            buttons=self.buttons,
+            ls=Stick(x=self.ls_x, y=self.ls_y),
+            rs=Stick(x=self.rs_x, y=self.rs_y)
+        )
+
+
+class TraceWriter:
+    """
+    Appends TraceRecords to a binary trace file from a background thread so
+    that the caller never blocks on disk I/O.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        self.path: Final = path
+        self.flush_interval: Final = flush_interval
+        self.records: Final = queue.SimpleQueue()
+        self.fp: BinaryIO = open(path, "wb")
+        self.fp.write(HEADER.pack(MAGIC, VERSION))
+        self.stopped: Final = threading.Event()
+        self.writer_thread: Final = threading.Thread(target=self.run, daemon=True)
+        self.writer_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, record: TraceRecord) -> None:
+        self.records.put(record)
+
+    def run(self):
+        buf = bytearray()
+        while not self.stopped.is_set() or not self.records.empty():
+            try:
+                record = self.records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            buf += RECORD.pack(*record)
+            # drain whatever else is pending so a burst costs a single write
+            while True:
+                try:
+                    buf += RECORD.pack(*self.records.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.fp.write(buf)
+                self.fp.flush()
+            except Exception as e:
+                logger.error(f"Failed to write trace records: {e}")
+            buf.clear()
+
+    def close(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.writer_thread.join()
+        self.fp.close()
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    with open(path, "rb") as fp:
+        magic, version = HEADER.unpack(fp.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a controller trace: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trace version {version}: {path}")
+        data = fp.read()
+    usable = len(data) - len(data) % RECORD.size
+    for fields in RECORD.iter_unpack(data[:usable]):
+        yield TraceRecord(*fields)
+
+
+def timed(records: Iterable[TraceRecord], speed: float = 1.0) -> Iterator[TraceRecord]:
+    """
+    Yield records at their original relative timing (scaled by speed).
+    """
+    start_ns = None
+    first_ns = 0
+    for record in records:
+        if start_ns is None:
+            start_ns = time.monotonic_ns()
+            first_ns = record.timestamp_ns
+        due_ns = start_ns + int((record.timestamp_ns - first_ns) / speed)
+        delay = (due_ns - time.monotonic_ns()) / 1e9
+        if delay > 0:
+            time.sleep(delay)
+        yield record
+
+
+def replay(records: Iterable[TraceRecord], client, speed: float = 1.0) -> int:
+    """
+    Replay records one SetState call at a time through an NsControllerClient.
+    Returns the number of states sent.
+    """
+    sent = 0
+    for record in timed(records, speed):
+        client.set_state(record.to_state(), post_delay=None)
+        sent += 1
+    return sent
+
+
+def replay_stream(records: Iterable[TraceRecord], stub, speed: float = 1.0):
+    """
+    Replay records as a single StreamState call, so the server receives the
+    whole timeline over one RPC instead of one round-trip per state.
+    """
+    return stub.StreamState(record.to_state() for record in timed(records, speed))
@@ -0,0 +1,268 @@
+import threading
+import time
+import wave
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Final, Protocol
+
+import numpy as np
+from loguru import logger
+
+try:
+    import alsaaudio
+except ImportError:
+    alsaaudio = None
+
+ALSA_MISSING: Final = ("ALSA capture requires pyalsaaudio: install the 'audio' extra "
+                       "(building it needs the ALSA development headers, e.g. libasound2-dev)")
+
+# numpy sample type by WAV sample width in bytes
+SAMPLE_TYPES: Final = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def to_mono(pcm: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Interleaved integer PCM as mono float32 samples in [-1, 1]"""
+    sample_type = SAMPLE_TYPES.get(sample_width)
+    if sample_type is None:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+    samples = np.frombuffer(pcm, dtype=sample_type).astype(np.float32)
+    if sample_type is np.uint8:
+        samples -= 128
+    samples /= float(2 ** (8 * sample_width - 1))
+    return samples.reshape(-1, channels).mean(axis=1)
+
+
+class AudioSource(Protocol):
+    rate: int
+    block_size: int
+    # time.monotonic() at which the last block read ended
+    timestamp: float
+
+    def read(self) -> np.ndarray | None:
+        """The next block of block_size mono samples, or None at the end of the stream"""
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class WavSource:
+    """
+    Reads a WAV file in blocks. With realtime, blocks are released at the pace a
+    live device would deliver them; otherwise as fast as they are read, with
+    timestamps on a virtual timeline starting when the file was opened.
+    """
+
+    def __init__(self, path: str, block_size: int = 1024, realtime: bool = False):
+        self.path: Final = path
+        self.block_size: Final = block_size
+        self.realtime: Final = realtime
+        self.wav: Final = wave.open(path, "rb")
+        self.rate: Final = self.wav.getframerate()
+        self.start: Final = time.monotonic()
+        self.position = 0
+        self.timestamp = self.start
+
+    def read(self) -> np.ndarray | None:
+        pcm = self.wav.readframes(self.block_size)
+        samples = to_mono(pcm, self.wav.getsampwidth(), self.wav.getnchannels())
+        if len(samples) < self.block_size:
+            return None
+        self.position += len(samples)
+        self.timestamp = self.start + self.position / self.rate
+        if self.realtime:
+            delay = self.timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return samples
+
+    def close(self) -> None:
+        self.wav.close()
+
+
+class AlsaSource:
+    """Captures 16-bit PCM in blocks from an ALSA device (e.g. a capture card's audio interface)"""
+
+    def __init__(self, device: str = "default", rate: int = 48000, channels: int = 2, block_size: int = 1024):
+        if alsaaudio is None:
+            raise RuntimeError(ALSA_MISSING)
+        self.device: Final = device
+        self.rate: Final = rate
+        self.channels: Final = channels
+        self.block_size: Final = block_size
+        self.pcm: Final = alsaaudio.PCM(alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NORMAL, device=device, rate=rate,
+                                        channels=channels, format=alsaaudio.PCM_FORMAT_S16_LE, periodsize=block_size)
+        self.pending = np.empty(0, dtype=np.float32)
+        self.timestamp = time.monotonic()
+
+    def read(self) -> np.ndarray | None:
+        while len(self.pending) < self.block_size:
+            length, pcm = self.pcm.read()
+            if length < 0:
+                logger.warning(f"ALSA capture overrun on {self.device}")
+                continue
+            self.pending = np.concatenate((self.pending, to_mono(pcm, 2, self.channels)))
+        self.timestamp = time.monotonic()
+        samples, self.pending = self.pending[:self.block_size], self.pending[self.block_size:]
+        return samples
+
+    def close(self) -> None:
+        self.pcm.close()
+
+
+class Spectrogram:
+    """
+    Streaming log-magnitude spectrogram: each block is transformed together with
+    the previous one through a Hann window (50% overlap), keeping only the bins
+    between low and high Hz.
+    """
+
+    def __init__(self, rate: int, block_size: int, low: float = 1000, high: float | None = None):
+        self.window: Final = np.hanning(2 * block_size).astype(np.float32)
+        frequencies = np.fft.rfftfreq(2 * block_size, 1 / rate)
+        self.bins: Final = (frequencies >= low) & (frequencies <= (high or rate / 2))
+        self.previous = np.zeros(block_size, dtype=np.float32)
+
+    def update(self, block: np.ndarray) -> np.ndarray:
+        samples = np.concatenate((self.previous, block))
+        self.previous = block
+        return np.log1p(np.abs(np.fft.rfft(samples * self.window))[self.bins])
+
+
+def standardize(spectra: np.ndarray) -> np.ndarray:
+    """
+    Subtract each frequency bin's mean over time, which removes steady background
+    (music, hum, noise floor), and scale to unit norm so that a dot product of two
+    standardised spectrograms is a correlation coefficient.
+    """
+    spectra = spectra - spectra.mean(axis=0)
+    norm = np.linalg.norm(spectra)
+    return spectra / norm if norm > 0 else spectra
+
+
+@dataclass(frozen=True)
+class AudioDetection:
+    # time.monotonic() at which the matched sound started
+    timestamp: float
+    # seconds into the stream at which the matched sound started
+    offset: float
+    # correlation with the reference clip, in [-1, 1]
+    score: float
+
+
+class AudioDetector:
+    """
+    Listens for a reference sound (such as the shiny sparkle chime) in an audio
+    stream by correlating the spectrogram of the most recent audio with the
+    reference clip's spectrogram after every block. Only the frequency bins in
+    which the reference is loud (within `bin_range` of its peak, on the log
+    scale) are compared, so broadband noise elsewhere cannot dilute a match.
+
+    Runs on its own thread next to the FrameGrabber; sound is matched regardless
+    of where on screen the Pokémon is, at a fraction of the cost of pixel analysis.
+    """
+
+    def __init__(self,
+                 source: AudioSource,
+                 reference: str,
+                 threshold: float = 0.6,
+                 low: float = 1000,
+                 high: float | None = None,
+                 bin_range: float = 0.5):
+        self.source: Final = source
+        self.threshold: Final = threshold
+        self.low: Final = low
+        self.high: Final = high
+        spectra = self.reference_spectra(reference)
+        peaks = spectra.max(axis=0)
+        # the bins that carry the reference sound
+        self.active: Final = np.flatnonzero(peaks >= peaks.max() * bin_range)
+        self.template: Final = standardize(spectra[:, self.active])
+        self.spectrogram: Final = Spectrogram(source.rate, source.block_size, low, high)
+        self.recent: Final = deque(maxlen=len(self.template))
+        self.blocks = 0
+        # best match so far of a sound still being correlated
+        self.candidate: AudioDetection | None = None
+        self.events: Final[list[AudioDetection]] = []
+        self.callbacks: Final[list[Callable[[AudioDetection], None]]] = []
+        self.found: Final = threading.Event()
+        self.stopped: Final = threading.Event()
+        self.listener_thread: Final = threading.Thread(target=self.run, daemon=True)
+
+    def reference_spectra(self, path: str) -> np.ndarray:
+        reference = WavSource(path, self.source.block_size)
+        try:
+            if reference.rate != self.source.rate:
+                raise ValueError(f"Reference clip is sampled at {reference.rate} Hz, stream at {self.source.rate} Hz")
+            spectrogram = Spectrogram(reference.rate, reference.block_size, self.low, self.high)
+            spectra = []
+            while (block := reference.read()) is not None:
+                spectra.append(spectrogram.update(block))
+        finally:
+            reference.close()
+        if not spectra:
+            raise ValueError(f"Reference clip is shorter than one block: {path}")
+        return np.array(spectra)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self.listener_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.listener_thread.is_alive() and self.listener_thread is not threading.current_thread():
+            self.listener_thread.join()
+        self.source.close()
+
+    def on_detect(self, callback: Callable[[AudioDetection], None]) -> None:
+        """Call back (from the listener's thread) for every detection"""
+        self.callbacks.append(callback)
+
+    def update(self, block: np.ndarray) -> AudioDetection | None:
+        """Add a block of samples and return a detection if the latest audio matches the reference"""
+        self.recent.append(self.spectrogram.update(block)[self.active])
+        self.blocks += 1
+        if len(self.recent) < len(self.template):
+            return None
+        score = float(np.vdot(standardize(np.array(self.recent)), self.template))
+        if score >= self.threshold and (self.candidate is None or score > self.candidate.score):
+            duration = len(self.template) * self.source.block_size / self.source.rate
+            offset = self.blocks * self.source.block_size / self.source.rate - duration
+            self.candidate = AudioDetection(self.source.timestamp - duration, offset, score)
+            return None
+        # report a sound once, at its best-aligned block, once the correlation falls off its peak
+        detection, self.candidate = self.candidate, None
+        if detection is not None:
+            self.recent.clear()
+        return detection
+
+    def flush(self) -> AudioDetection | None:
+        """At the end of the stream, the sound still being correlated, if any, as it stands"""
+        detection, self.candidate = self.candidate, None
+        return detection
+
+    def run(self):
+        while not self.stopped.is_set():
+            block = self.source.read()
+            detection = self.flush() if block is None else self.update(block)
+            if detection is not None:
+                self.report(detection)
+            if block is None:
+                break
+
+    def report(self, detection: AudioDetection) -> None:
+        logger.success(f"Sound matched at {detection.offset:.2f}s (score {detection.score:.2f})")
+        self.events.append(detection)
+        self.found.set()
+        for callback in self.callbacks:
+            try:
+                callback(detection)
+            except Exception as e:
+                logger.error(f"Audio detection callback failed: {e}")
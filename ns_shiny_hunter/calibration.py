@@ -0,0 +1,221 @@
+import math
+import pathlib
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from typing import Final
+
+import cv2
+import numpy as np
+
+from .corpus import load_references
+from .frame import Frame, SimpleReferenceFrame
+from .frame_grabber import CapturedFrame
+from .shiny import ShinyIndicator
+
+POSITIVE: Final = "positive"
+NEGATIVE: Final = "negative"
+# captures of the scene without the indicator, whose median share is a relative indicator's baseline
+BASELINE: Final = "baseline"
+# labelled directories of shiny indicators are named "shiny.<indicator name>"
+INDICATOR_PREFIX: Final = "shiny."
+
+
+@dataclass
+class ScoreStats:
+    count: int
+    min: float
+    max: float
+    mean: float
+    p05: float
+    p95: float
+
+    @classmethod
+    def from_scores(cls, scores: np.ndarray) -> 'ScoreStats | None':
+        if scores.size == 0:
+            return None
+        p05, p95 = np.percentile(scores, [5, 95])
+        return cls(int(scores.size), float(scores.min()), float(scores.max()), float(scores.mean()),
+                   float(p05), float(p95))
+
+
+@dataclass
+class Calibration:
+    name: str
+    threshold: float
+    proposed_threshold: float | None
+    # gap between the worst positive and the best negative; <= 0 means they overlap
+    margin: float | None
+    positives: ScoreStats | None
+    negatives: ScoreStats | None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def score_frames(reference: SimpleReferenceFrame, frames: Iterable[Frame]) -> np.ndarray:
+    """
+    Percent-mismatch scores of many captures against one reference.
+
+    Each capture still goes through the reference's processor, but the diff against
+    the template is done for the whole stack in a single vectorised comparison.
+    """
+    prepared = [reference.frame_processor.prepare_frame(frame) for frame in frames]
+    if not prepared:
+        return np.empty(0, dtype=np.float64)
+    stack = np.stack(prepared)
+    differs = np.not_equal(stack, reference.frame[np.newaxis])
+    return differs.reshape(len(prepared), -1).mean(axis=1) * 100
+
+
+def calibrate(name: str,
+              reference: SimpleReferenceFrame,
+              positives: list[Frame],
+              negatives: list[Frame],
+              headroom: float = 0.5) -> Calibration:
+    """
+    Propose a threshold for a reference from labelled captures.
+
+    With both classes the proposal sits midway between the worst positive and the
+    best negative; with positives only, it is the worst positive plus a headroom
+    fraction of itself. A reference matches below its threshold, so the proposal
+    is only rounded (to 0.1) where that keeps every positive below it and every
+    negative at or above it.
+    """
+    positive_scores = score_frames(reference, positives)
+    negative_scores = score_frames(reference, negatives)
+
+    margin = None
+    proposed = None
+    if positive_scores.size and negative_scores.size:
+        worst_positive = float(positive_scores.max())
+        best_negative = float(negative_scores.min())
+        margin = best_negative - worst_positive
+        if margin > 0:
+            proposed = worst_positive + margin / 2
+            rounded = round(proposed, 1)
+            if worst_positive < rounded <= best_negative:
+                proposed = rounded
+    elif positive_scores.size:
+        worst_positive = float(positive_scores.max())
+        # rounding up keeps the headroom above the worst positive
+        proposed = math.ceil(max(worst_positive * (1 + headroom), 1.0) * 10) / 10
+
+    return Calibration(
+        name=name,
+        threshold=reference.threshold,
+        proposed_threshold=proposed,
+        margin=round(margin, 3) if margin is not None else None,
+        positives=ScoreStats.from_scores(positive_scores),
+        negatives=ScoreStats.from_scores(negative_scores),
+    )
+
+
+def indicator_fractions(indicator: ShinyIndicator, frames: Iterable[Frame]) -> np.ndarray:
+    return np.array([indicator.fraction(indicator.sample(CapturedFrame(0, 0.0, frame))) for frame in frames],
+                    dtype=np.float64)
+
+
+def score_indicator(indicator: ShinyIndicator, frames: Iterable[Frame], baseline: Iterable[Frame] = ()) -> np.ndarray:
+    """
+    Shares of in-range pixels of an indicator on many captures; for a relative
+    indicator, the rise of each share above the median share of the baseline captures.
+    """
+    scores = indicator_fractions(indicator, frames)
+    if indicator.relative:
+        baseline_fractions = indicator_fractions(indicator, baseline)
+        if baseline_fractions.size == 0:
+            raise ValueError(f"Relative indicator {indicator.name} needs baseline captures")
+        scores -= float(np.median(baseline_fractions))
+    return scores
+
+
+def calibrate_indicator(indicator: ShinyIndicator,
+                        positives: list[Frame],
+                        negatives: list[Frame],
+                        baseline: list[Frame] = (),
+                        headroom: float = 0.5) -> Calibration:
+    """
+    Propose a shiny indicator's min_fraction from labelled captures.
+
+    An indicator hits at or above its min_fraction, so unlike a reference's
+    threshold the proposal sits below the worst positive and above the best
+    negative. With negatives only it is the best negative plus a headroom
+    fraction of itself, rounded up (to 0.001) so the headroom is kept.
+    """
+    positive_scores = score_indicator(indicator, positives, baseline)
+    negative_scores = score_indicator(indicator, negatives, baseline)
+
+    margin = None
+    proposed = None
+    if positive_scores.size and negative_scores.size:
+        worst_positive = float(positive_scores.min())
+        best_negative = float(negative_scores.max())
+        margin = worst_positive - best_negative
+        if margin > 0:
+            proposed = best_negative + margin / 2
+            rounded = round(proposed, 3)
+            if best_negative < rounded <= worst_positive:
+                proposed = rounded
+    elif negative_scores.size:
+        best_negative = float(negative_scores.max())
+        proposed = math.ceil(max(best_negative * (1 + headroom), 0.001) * 1000) / 1000
+
+    return Calibration(
+        name=f"{INDICATOR_PREFIX}{indicator.name}",
+        threshold=indicator.min_fraction,
+        proposed_threshold=proposed,
+        margin=round(margin, 5) if margin is not None else None,
+        positives=ScoreStats.from_scores(positive_scores),
+        negatives=ScoreStats.from_scores(negative_scores),
+    )
+
+
+def read_frames(directory: pathlib.Path) -> list[Frame]:
+    if not directory.is_dir():
+        return []
+    paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    return [cv2.imread(str(path)) for path in paths]
+
+
+def calibrate_directory(root: pathlib.Path, indicators: Iterable[ShinyIndicator] = ()) -> list[Calibration]:
+    """
+    Calibrate every reference with a labelled directory under root, laid out as
+    <root>/<Enum>.<MEMBER>/{positive,negative}/*.jpg, and every shiny indicator
+    laid out as <root>/shiny.<name>/{positive,negative,baseline}/*.jpg
+    """
+    references = load_references()
+    indicators = {f"{INDICATOR_PREFIX}{indicator.name}": indicator for indicator in indicators}
+    calibrations = []
+    for directory in sorted(p for p in root.iterdir() if p.is_dir()):
+        indicator = indicators.get(directory.name)
+        if indicator is not None:
+            calibrations.append(calibrate_indicator(
+                indicator,
+                read_frames(directory / POSITIVE),
+                read_frames(directory / NEGATIVE),
+                read_frames(directory / BASELINE),
+            ))
+            continue
+        reference = references.get(directory.name)
+        if reference is None:
+            raise ValueError(f"No SimpleReferenceFrame named {directory.name}")
+        calibrations.append(calibrate(
+            directory.name,
+            reference,
+            read_frames(directory / POSITIVE),
+            read_frames(directory / NEGATIVE),
+        ))
+    return calibrations
+
+
+def find_regressions(calibrations: list[Calibration], baseline: dict[str, dict],
+                     tolerance: float = 0.0) -> list[str]:
+    """Names of references whose margin shrank by more than tolerance (or started overlapping)"""
+    regressions = []
+    for calibration in calibrations:
+        previous = baseline.get(calibration.name)
+        if previous is None or previous.get("margin") is None or calibration.margin is None:
+            continue
+        if calibration.margin < previous["margin"] - tolerance or (calibration.margin <= 0 < previous["margin"]):
+            regressions.append(calibration.name)
+    return regressions
@@ -0,0 +1,85 @@
+import importlib
+import pathlib
+from collections.abc import Iterable, Iterator
+from typing import Final
+
+import cv2
+import numpy as np
+
+from .frame import Frame, ReferenceFrame, ReferenceFrameEnum, SimpleReferenceFrame
+
+ROOT: Final = pathlib.Path(__file__).parent
+
+# modules declaring the shipped ReferenceFrameEnums
+FRAME_MODULES: Final = (
+    "ns_shiny_hunter.legends_za.frames",
+    "ns_shiny_hunter.legends_za.scripts.bench_reset.frames",
+    "ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames",
+    "ns_shiny_hunter.legends_za.scripts.wz16.frames",
+    "ns_shiny_hunter.legends_za.scripts.wz20_alphas.frames",
+)
+
+
+def load_reference_enums(modules: Iterable[str] = FRAME_MODULES) -> list[type[ReferenceFrameEnum]]:
+    enums = []
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        for value in vars(module).values():
+            if (isinstance(value, type) and issubclass(value, ReferenceFrameEnum)
+                    and value is not ReferenceFrameEnum and value.__module__ == module_name):
+                enums.append(value)
+    return enums
+
+
+def unwrap(reference: ReferenceFrame) -> ReferenceFrame:
+    """Strip enum and logging wrappers down to the underlying reference"""
+    while True:
+        if isinstance(reference, ReferenceFrameEnum):
+            reference = reference.value
+        elif hasattr(reference, "delegate"):
+            reference = reference.delegate
+        else:
+            return reference
+
+
+def load_references(modules: Iterable[str] = FRAME_MODULES) -> dict[str, SimpleReferenceFrame]:
+    """All shipped SimpleReferenceFrames, keyed by "Enum.MEMBER" """
+    references = {}
+    for enum in load_reference_enums(modules):
+        for member in enum:
+            reference = unwrap(member)
+            if isinstance(reference, SimpleReferenceFrame):
+                references[f"{enum.__name__}.{member.name}"] = reference
+    return references
+
+
+def frame_paths(root: pathlib.Path = ROOT) -> list[pathlib.Path]:
+    """Every shipped reference capture under a frames/ directory"""
+    return sorted(root.glob("**/frames/*.jpg"))
+
+
+def load_frames(paths: Iterable[pathlib.Path]) -> dict[pathlib.Path, Frame]:
+    return {path.resolve(): cv2.imread(str(path)) for path in paths}
+
+
+def add_noise(frame: Frame, sigma: float, seed: int = 0) -> Frame:
+    noise = np.random.default_rng(seed).normal(0, sigma, frame.shape)
+    return np.clip(frame.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def shift_brightness(frame: Frame, delta: int) -> Frame:
+    return cv2.convertScaleAbs(frame, alpha=1.0, beta=delta)
+
+
+# name -> transform applied to a capture to simulate capture-card variation
+VARIANTS: Final = {
+    "noise-4": lambda frame: add_noise(frame, 4),
+    "noise-8": lambda frame: add_noise(frame, 8),
+    "brightness+20": lambda frame: shift_brightness(frame, 20),
+    "brightness-20": lambda frame: shift_brightness(frame, -20),
+}
+
+
+def variants(frame: Frame) -> Iterator[tuple[str, Frame]]:
+    for name, transform in VARIANTS.items():
+        yield name, transform(frame)
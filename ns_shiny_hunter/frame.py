@@ -1,12 +1,17 @@
 import os.path
 import pathlib
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import astuple, dataclass
 from enum import IntEnum, auto, Enum
 from typing import Any, Final, Protocol
 
 import cv2
 import numpy as np
 
+from .template_cache import load_template
+
 Frame = cv2.Mat | np.ndarray[Any, np.dtype] | np.ndarray
 
 
@@ -26,6 +31,53 @@ class ThresholdParams:
     c: float = 2
 
 
+class PreparedFrameCache:
+    """
+    Memoizes prepared ROIs for the most recent frame, keyed by processor configuration.
+
+    Entries are only valid for the frame object they were computed from; passing a
+    different frame (or calling clear, as FrameGrabber does when it publishes a new
+    frame) drops everything. Cached arrays are shared, so callers must not modify
+    them. Compiled processors cache their scratch buffers under their own key, so
+    an uncompiled prepare_frame always returns an array its caller may keep.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize: Final = maxsize
+        self.lock: Final = threading.Lock()
+        self.frame: Frame | None = None
+        self.entries: Final[OrderedDict[Hashable, Frame]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, frame: Frame, key: Hashable, prepare: Callable[[Frame], Frame]) -> Frame:
+        with self.lock:
+            if self.frame is frame:
+                cached = self.entries.get(key)
+                if cached is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return cached
+        prepared = prepare(frame)
+        with self.lock:
+            self.misses += 1
+            if self.frame is not frame:
+                self.frame = frame
+                self.entries.clear()
+            self.entries[key] = prepared
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return prepared
+
+    def clear(self) -> None:
+        with self.lock:
+            self.frame = None
+            self.entries.clear()
+
+
+PREPARED_FRAME_CACHE: Final = PreparedFrameCache()
+
+
 class RotationInvariantFrameProcessor:
     """Frame processor for detecting icons regardless of rotation within an ROI"""
 
@@ -46,6 +98,32 @@ class FrameProcessor(Protocol):
         ...
 
 
+class CompiledFrameProcessor(Protocol):
+    def prepare_frame(self, frame: Frame) -> Frame:
+        """Prepare the frame into preallocated buffers (only valid until the next call)"""
+        ...
+
+
+class CompiledFrameProcessors(threading.local):
+    """
+    One compiled processor (and set of scratch buffers) per processor configuration
+    and thread, so threads matching side by side (script, preview, shiny detector)
+    never prepare into each other's buffers.
+    """
+
+    def __init__(self):
+        self.processors: Final[dict[Hashable, CompiledFrameProcessor]] = {}
+
+    def get(self, key: Hashable, compile: Callable[[], CompiledFrameProcessor]) -> CompiledFrameProcessor:
+        compiled = self.processors.get(key)
+        if compiled is None:
+            compiled = self.processors[key] = compile()
+        return compiled
+
+
+COMPILED_FRAME_PROCESSORS: Final = CompiledFrameProcessors()
+
+
 class SimpleFrameProcessor(FrameProcessor):
     def __init__(self,
                  x: int,
@@ -62,15 +140,33 @@ class SimpleFrameProcessor(FrameProcessor):
         self.color_space: Final = color_space
         self.blur_params: Final = blur_params
         self.threshold_params: Final = threshold_params
+        # identifies processors that produce identical output for the same frame
+        self.key: Final = (
+            SimpleFrameProcessor,
+            self.x1, self.y1, self.x2, self.y2,
+            color_space,
+            astuple(blur_params) if blur_params is not None else None,
+            astuple(threshold_params) if threshold_params is not None else None
+        )
 
     @classmethod
     def from_points(cls, p1: tuple[int, int], p2: tuple[int, int], **kwargs) -> 'SimpleFrameProcessor':
         return cls(p1[0], p1[1], p2[0] - p1[0], p2[1] - p1[1], **kwargs)
 
     def prepare_frame(self, frame: Frame) -> Frame:
+        return PREPARED_FRAME_CACHE.get(frame, self.key, self._prepare_frame)
+
+    def _prepare_frame(self, frame: Frame) -> Frame:
         frame = frame[self.y1:self.y2, self.x1:self.x2]
         if self.color_space is not None:
             frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return self.filter_frame(frame)
+
+    def compile(self) -> CompiledFrameProcessor:
+        return COMPILED_FRAME_PROCESSORS.get(self.key, lambda: CompiledSimpleFrameProcessor(self))
+
+    def filter_frame(self, frame: Frame) -> Frame:
+        """Apply blur and threshold to an already cropped and color-converted ROI"""
         if self.blur_params is not None:
             frame = cv2.GaussianBlur(frame, self.blur_params.ksize, sigmaX=self.blur_params.sigma_x, sigmaY=self.blur_params.sigma_y)
         if self.threshold_params is not None:
@@ -83,6 +179,46 @@ class SimpleFrameProcessor(FrameProcessor):
         return frame
 
 
+class CompiledSimpleFrameProcessor(CompiledFrameProcessor):
+    """SimpleFrameProcessor pipeline writing every step into preallocated buffers"""
+
+    def __init__(self, processor: SimpleFrameProcessor):
+        self.processor: Final = processor
+        # the result lives in this instance's buffers, so it must not be handed out under the processor's key
+        self.key: Final = ("compiled", id(self), *processor.key)
+        self.shape: tuple[int, ...] | None = None
+        self.buffers: list[np.ndarray] = []
+
+    def allocate(self, roi: Frame) -> None:
+        shape = roi.shape[:2] if self.processor.color_space is not None else roi.shape
+        self.shape = roi.shape
+        self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(3)]
+
+    def prepare_frame(self, frame: Frame) -> Frame:
+        return PREPARED_FRAME_CACHE.get(frame, self.key, self._prepare_frame)
+
+    def _prepare_frame(self, frame: Frame) -> Frame:
+        processor = self.processor
+        frame = frame[processor.y1:processor.y2, processor.x1:processor.x2]
+        if frame.shape != self.shape:
+            self.allocate(frame)
+        converted, blurred, thresholded = self.buffers
+        if processor.color_space is not None:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=converted)
+        if processor.blur_params is not None:
+            frame = cv2.GaussianBlur(frame, processor.blur_params.ksize, dst=blurred,
+                                     sigmaX=processor.blur_params.sigma_x, sigmaY=processor.blur_params.sigma_y)
+        if processor.threshold_params is not None:
+            frame = cv2.adaptiveThreshold(frame,
+                                          processor.threshold_params.max_value,
+                                          processor.threshold_params.adaptive_method,
+                                          processor.threshold_params.threshold_type,
+                                          processor.threshold_params.block_size,
+                                          processor.threshold_params.c,
+                                          dst=thresholded)
+        return frame
+
+
 class PolygonFrameProcessor(FrameProcessor):
     def __init__(self,
                  points: np.ndarray,
@@ -96,14 +232,130 @@ class PolygonFrameProcessor(FrameProcessor):
         self.points: Final = points
         self.ksize: Final = ksize
         self.sigma_x: Final = sigma_x
+        self.key: Final = (PolygonFrameProcessor, points.tobytes(), tuple(ksize), sigma_x)
+        # rasterise the polygon once, at bounding-box size, relative to the ROI origin
+        self.mask: Final = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [points - np.array([x, y], dtype=points.dtype)], 255)
 
     def prepare_frame(self, frame: Frame) -> Frame:
-        mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-        cv2.fillPoly(mask, [self.points], 255)
-        frame = cv2.bitwise_and(frame, frame, mask=mask)
+        return PREPARED_FRAME_CACHE.get(frame, self.key, self._prepare_frame)
+
+    def _prepare_frame(self, frame: Frame) -> Frame:
         frame = frame[self.y1:self.y2, self.x1:self.x2]
+        frame = cv2.bitwise_and(frame, frame, mask=self.mask)
         return cv2.GaussianBlur(frame, self.ksize, self.sigma_x)
 
+    def compile(self) -> CompiledFrameProcessor:
+        return COMPILED_FRAME_PROCESSORS.get(self.key, lambda: CompiledPolygonFrameProcessor(self))
+
+
+class CompiledPolygonFrameProcessor(CompiledFrameProcessor):
+    """PolygonFrameProcessor pipeline writing every step into preallocated buffers"""
+
+    def __init__(self, processor: PolygonFrameProcessor):
+        self.processor: Final = processor
+        # the result lives in this instance's buffers, so it must not be handed out under the processor's key
+        self.key: Final = ("compiled", id(self), *processor.key)
+        self.shape: tuple[int, ...] | None = None
+        self.buffers: list[np.ndarray] = []
+
+    def allocate(self, roi: Frame) -> None:
+        self.shape = roi.shape
+        # masked-out pixels are never written by bitwise_and, so they must start (and stay) zero
+        self.buffers = [np.zeros(roi.shape, dtype=roi.dtype), np.empty(roi.shape, dtype=roi.dtype)]
+
+    def prepare_frame(self, frame: Frame) -> Frame:
+        return PREPARED_FRAME_CACHE.get(frame, self.key, self._prepare_frame)
+
+    def _prepare_frame(self, frame: Frame) -> Frame:
+        processor = self.processor
+        frame = frame[processor.y1:processor.y2, processor.x1:processor.x2]
+        if frame.shape != self.shape:
+            self.allocate(frame)
+        masked, blurred = self.buffers
+        cv2.bitwise_and(frame, frame, dst=masked, mask=processor.mask)
+        return cv2.GaussianBlur(masked, processor.ksize, dst=blurred, sigmaX=processor.sigma_x)
+
+
+class ChangeGate:
+    """
+    Remembers the last raw ROI a reference evaluated, and the score it got, so that
+    an unchanged ROI (static dialog, loading screen, same frame polled twice) can
+    reuse that score instead of re-running the match.
+
+    The whole ROI is compared, so a one-pixel cursor or thin text still counts as a
+    change. The state is locked, as the script, preview and detectors may match the
+    same reference from different threads.
+    """
+
+    def __init__(self, x1: int, y1: int, x2: int, y2: int):
+        self.x1: Final = x1
+        self.y1: Final = y1
+        self.x2: Final = x2
+        self.y2: Final = y2
+        self.lock: Final = threading.Lock()
+        self.signature: np.ndarray | None = None
+        self.diff: np.ndarray | None = None
+        self.score: float | None = None
+        # bumped whenever the stored ROI changes, so a score computed for an older ROI is not stored
+        self.generation = 0
+        self.checks = 0
+        self.skips = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def check(self, frame: Frame) -> tuple[float | None, int]:
+        """
+        Return the stored score if the ROI is unchanged since it was computed, else
+        None (storing the ROI), along with the generation to pass to store()
+        """
+        roi = frame[self.y1:self.y2, self.x1:self.x2]
+        with self.lock:
+            self.checks += 1
+            if self.signature is not None and self.signature.shape == roi.shape:
+                cv2.absdiff(self.signature, roi, dst=self.diff)
+                if cv2.countNonZero(self.diff.reshape(self.diff.shape[0], -1)) == 0:
+                    if self.score is not None:
+                        self.skips += 1
+                    return self.score, self.generation
+                np.copyto(self.signature, roi)
+            else:
+                self.signature = roi.copy()
+                self.diff = np.empty_like(roi)
+            self.score = None
+            self.generation += 1
+            return None, self.generation
+
+    def store(self, generation: int, score: float) -> None:
+        with self.lock:
+            if generation == self.generation:
+                self.score = score
+
+    def reset(self) -> None:
+        with self.lock:
+            self.signature = None
+            self.score = None
+            self.generation += 1
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skips / self.checks if self.checks else 0.0
+
+
+class MatchScratch(threading.local):
+    """A reference's compiled processor and diff buffer for the calling thread"""
+
+    def __init__(self):
+        self.compiled_processor: CompiledFrameProcessor | None = None
+        self.diff: np.ndarray | None = None
+
 
 class ReferenceFrame:
     def matches(self, frame: Frame) -> bool:
@@ -114,42 +366,106 @@ class ReferenceFrame:
 
 
 class SimpleReferenceFrame(ReferenceFrame):
+    """
+    Reference screen matched by per-pixel comparison of a processed ROI.
+
+    References created from a file are lazy: the image is only decoded and
+    processed on first use, and the processed template is kept in the on-disk
+    template cache so later runs skip both steps.
+    """
+
+    load_lock: Final = threading.Lock()
+    # set to False to always re-run matching (benchmarks, calibration)
+    change_detection: bool = True
+
     def __init__(self,
-                 frame: Frame,
+                 frame: Frame | None,
                  frame_processor: FrameProcessor,
-                 threshold: int = 1):
-        self.frame: Final = frame
+                 threshold: float = 1,
+                 source: pathlib.Path | None = None,
+                 detect_changes: bool = True):
+        if frame is None and source is None:
+            raise ValueError("A reference frame needs either a frame or a source to load it from")
+        self._frame = frame
         self.frame_processor: Final = frame_processor
         self.threshold: Final = threshold
+        self.source: Final = source
+        self.scratch = MatchScratch()
+        self.change_gate: ChangeGate | None = None
+        if detect_changes and all(hasattr(frame_processor, a) for a in ("x1", "y1", "x2", "y2")):
+            self.change_gate = ChangeGate(frame_processor.x1, frame_processor.y1,
+                                          frame_processor.x2, frame_processor.y2)
+
+    def __getstate__(self):
+        # scratch buffers belong to the threads of this process
+        state = self.__dict__.copy()
+        del state["scratch"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.scratch = MatchScratch()
+
+    @property
+    def frame(self) -> Frame:
+        if self._frame is None:
+            with self.load_lock:
+                if self._frame is None:
+                    self._frame = load_template(self.source,
+                                                getattr(self.frame_processor, "key", None),
+                                                self.frame_processor.prepare_frame)
+        return self._frame
+
+    @property
+    def loaded(self) -> bool:
+        return self._frame is not None
 
     @classmethod
     def create_from_file(cls,
                          srcfile: str,
                          filepath: str,
                          frame_processor: FrameProcessor,
-                         threshold: int = 1) -> ReferenceFrame:
+                         threshold: float = 1) -> ReferenceFrame:
         filepath = os.path.join(os.path.dirname(srcfile), 'frames', filepath)
-        return cls.create_from_frame(cv2.imread(filepath), frame_processor, threshold)
+        return cls(None, frame_processor, threshold, pathlib.Path(filepath))
 
     @classmethod
-    def create_from_path(cls, filepath: pathlib.Path, frame_processor: FrameProcessor, threshold: int = 1):
-        filepath = filepath.absolute()
-        return cls.create_from_frame(cv2.imread(str(filepath)), frame_processor, threshold)
+    def create_from_path(cls, filepath: pathlib.Path, frame_processor: FrameProcessor, threshold: float = 1):
+        return cls(None, frame_processor, threshold, filepath.absolute())
 
     @classmethod
     def create_from_frame(cls, frame: Frame, frame_processor: FrameProcessor,
-                          threshold: int = 1) -> 'SimpleReferenceFrame':
-        return cls(frame_processor.prepare_frame(frame), frame_processor, threshold)
+                          threshold: float = 1, source: pathlib.Path | None = None) -> 'SimpleReferenceFrame':
+        return cls(frame_processor.prepare_frame(frame).copy(), frame_processor, threshold, source)
 
     def matches(self, frame: Frame) -> bool:
         percent_match = self.get_percent_match(frame)
         return percent_match < self.threshold
 
     def get_percent_match(self, frame: Frame) -> float:
-        frame = self.frame_processor.prepare_frame(frame)
-        res = cv2.absdiff(self.frame, frame)
-        res = res.astype(np.uint8)
-        return (np.count_nonzero(res) * 100) / res.size
+        if self.change_gate is None or not self.change_detection:
+            return self._get_percent_match(frame)
+        percent_match, generation = self.change_gate.check(frame)
+        if percent_match is None:
+            percent_match = self._get_percent_match(frame)
+            self.change_gate.store(generation, percent_match)
+        return percent_match
+
+    def _get_percent_match(self, frame: Frame) -> float:
+        scratch = self.scratch
+        if scratch.compiled_processor is None:
+            if not hasattr(self.frame_processor, "compile"):
+                frame = self.frame_processor.prepare_frame(frame)
+                res = cv2.absdiff(self.frame, frame)
+                res = res.astype(np.uint8)
+                return (np.count_nonzero(res) * 100) / res.size
+            scratch.compiled_processor = self.frame_processor.compile()
+            scratch.diff = np.empty_like(self.frame)
+
+        frame = scratch.compiled_processor.prepare_frame(frame)
+        res = cv2.absdiff(self.frame, frame, dst=scratch.diff)
+        # countNonZero wants a single channel; fold channels into the row (a view, not a copy)
+        return (cv2.countNonZero(res.reshape(res.shape[0], -1)) * 100) / res.size
 
 
 class CompositeReferenceFrame(ReferenceFrame):
@@ -183,6 +499,43 @@ class ReferenceFrameEnum(ReferenceFrame, Enum):
     def get_percent_match(self, frame: Frame) -> float:
         return self.value.get_percent_match(frame)
 
+    def __reduce_ex__(self, protocol):
+        # values are reference objects, so pickle members by name (e.g. for VisionPool workers)
+        return getattr, (self.__class__, self.name)
+
+
+def _subclasses(cls: type) -> list[type]:
+    return [sub for direct in cls.__subclasses__() for sub in (direct, *_subclasses(direct))]
+
+
+def change_gate_stats(*enums: type[ReferenceFrameEnum]) -> dict[str, dict[str, float]]:
+    """
+    Change-detection checks, skips and skip rate for every gated reference in the
+    given enums (by default every ReferenceFrameEnum loaded), including the parts
+    of composite references
+    """
+    stats = {}
+
+    def add(name: str, reference: ReferenceFrame) -> None:
+        while isinstance(reference, LoggingReferenceFrame):
+            reference = reference.delegate
+        if isinstance(reference, CompositeReferenceFrame):
+            for i, child in enumerate(reference.frames):
+                add(f"{name}[{i}]", child)
+            return
+        gate = getattr(reference, "change_gate", None)
+        if gate is not None:
+            stats[name] = {
+                "checks": gate.checks,
+                "skips": gate.skips,
+                "skip_rate": gate.skip_rate,
+            }
+
+    for enum in enums or _subclasses(ReferenceFrameEnum):
+        for member in enum:
+            add(f"{enum.__name__}.{member.name}", member.value)
+    return stats
+
 
 class LoggingReferenceFrame(ReferenceFrame):
     def __init__(self, name: str, delegate: ReferenceFrame) -> None:
@@ -193,10 +546,17 @@ class LoggingReferenceFrame(ReferenceFrame):
     def matches(self, frame: Frame) -> bool:
         self.get_percent_match(frame)
         matches = self.delegate.matches(frame)
-        print(f"Matches for {self.name}: {matches}")
+        self.log_matches(matches)
         return matches
 
     def get_percent_match(self, frame: Frame) -> float:
         percent_match = self.delegate.get_percent_match(frame)
-        print(f"Percent match for {self.name}: {percent_match}")
+        self.log_percent_match(percent_match)
         return percent_match
+
+    # also called by ReferenceFrameBatch, which scores the delegate itself
+    def log_matches(self, matches: bool) -> None:
+        print(f"Matches for {self.name}: {matches}")
+
+    def log_percent_match(self, percent_match: float) -> None:
+        print(f"Percent match for {self.name}: {percent_match}")
@@ -0,0 +1,185 @@
+from collections.abc import Iterable
+from typing import Final
+
+import cv2
+import numpy as np
+
+from .frame import (
+    PREPARED_FRAME_CACHE,
+    CompositeReferenceFrame,
+    Frame,
+    LoggingReferenceFrame,
+    ReferenceFrame,
+    ReferenceFrameEnum,
+    SimpleFrameProcessor,
+    SimpleReferenceFrame,
+)
+
+
+def _leaves(reference: ReferenceFrame) -> Iterable[ReferenceFrame]:
+    if isinstance(reference, ReferenceFrameEnum):
+        yield from _leaves(reference.value)
+    elif isinstance(reference, LoggingReferenceFrame):
+        yield from _leaves(reference.delegate)
+    elif isinstance(reference, CompositeReferenceFrame):
+        for child in reference.frames:
+            yield from _leaves(child)
+    else:
+        yield reference
+
+
+class ReferenceFrameBatch:
+    """
+    Evaluates many reference frames against a single captured frame in one pass.
+
+    SimpleReferenceFrames using a SimpleFrameProcessor share one color conversion
+    over the union of their ROIs, identical processors run once, and all diffs are
+    counted with a single vectorised reduction. Any other reference is evaluated
+    through its own get_percent_match. Prepared ROIs go through PREPARED_FRAME_CACHE,
+    so they are shared with single-reference checks on the same frame.
+    LoggingReferenceFrames log the scores and results the batch computes for them,
+    as they do when evaluated on their own.
+    """
+
+    # Share one color conversion across ROIs unless the union is this much larger
+    # than the ROIs themselves (e.g. two small ROIs in opposite corners).
+    MAX_UNION_OVERHEAD: Final = 2.0
+
+    def __init__(self, references: Iterable[ReferenceFrame]):
+        self.references: Final = tuple(references)
+
+        leaves: dict[int, ReferenceFrame] = {}
+        for reference in self.references:
+            for leaf in _leaves(reference):
+                leaves.setdefault(id(leaf), leaf)
+
+        def is_batched(leaf: ReferenceFrame) -> bool:
+            return isinstance(leaf, SimpleReferenceFrame) and isinstance(leaf.frame_processor, SimpleFrameProcessor)
+
+        self.batched: Final = tuple(leaf for leaf in leaves.values() if is_batched(leaf))
+        self.fallback: Final = tuple(leaf for leaf in leaves.values() if not is_batched(leaf))
+
+        processors: dict[tuple, int] = {}
+        for leaf in self.batched:
+            processors.setdefault(leaf.frame_processor.key, len(processors))
+        self.processor_index: Final = tuple(processors[leaf.frame_processor.key] for leaf in self.batched)
+        self.processors: Final = tuple(
+            self.batched[self.processor_index.index(i)].frame_processor for i in range(len(processors))
+        )
+
+        gray = [p for p in self.processors if p.color_space is not None]
+        self.union: tuple[int, int, int, int] | None = None
+        if len(gray) > 1:
+            x1 = min(p.x1 for p in gray)
+            y1 = min(p.y1 for p in gray)
+            x2 = max(p.x2 for p in gray)
+            y2 = max(p.y2 for p in gray)
+            area = sum((p.x2 - p.x1) * (p.y2 - p.y1) for p in gray)
+            if (x2 - x1) * (y2 - y1) <= area * self.MAX_UNION_OVERHEAD:
+                self.union = (x1, y1, x2, y2)
+
+        # templates are concatenated on first use so building a batch never forces lazy references to load
+        self.offsets: np.ndarray | None = None
+        self.sizes: np.ndarray | None = None
+        self.expected: np.ndarray | None = None
+        self.candidate: np.ndarray | None = None
+        self.differs: np.ndarray | None = None
+        # leaf scores (by id) of the most recently evaluated frame, read by the preview's overlays
+        self.scores: dict[int, float] = {}
+
+    def _concatenate_templates(self) -> None:
+        sizes = [leaf.frame.size for leaf in self.batched]
+        self.offsets = np.cumsum([0] + sizes[:-1], dtype=np.intp)
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.expected = np.concatenate([leaf.frame.ravel() for leaf in self.batched])
+        self.candidate = np.empty_like(self.expected)
+        self.differs = np.empty(self.expected.shape, dtype=np.bool_)
+
+    def prepare_frames(self, frame: Frame) -> list[Frame]:
+        """Run every distinct processor of the batch against the frame"""
+        converted = None
+
+        def prepare(processor: SimpleFrameProcessor) -> Frame:
+            nonlocal converted
+            if self.union is None or processor.color_space is None:
+                roi = frame[processor.y1:processor.y2, processor.x1:processor.x2]
+                if processor.color_space is not None:
+                    roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+                return processor.filter_frame(roi)
+            x1, y1, x2, y2 = self.union
+            if converted is None:
+                converted = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+            roi = converted[processor.y1 - y1:processor.y2 - y1, processor.x1 - x1:processor.x2 - x1]
+            return processor.filter_frame(roi)
+
+        return [PREPARED_FRAME_CACHE.get(frame, processor.key, lambda _, p=processor: prepare(p))
+                for processor in self.processors]
+
+    def _leaf_scores(self, frame: Frame) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        if self.batched:
+            if self.expected is None:
+                self._concatenate_templates()
+            prepared = self.prepare_frames(frame)
+            for i, leaf in enumerate(self.batched):
+                start = self.offsets[i]
+                self.candidate[start:start + leaf.frame.size] = prepared[self.processor_index[i]].ravel()
+            np.not_equal(self.candidate, self.expected, out=self.differs)
+            counts = np.add.reduceat(self.differs.view(np.uint8), self.offsets, dtype=np.uint32)
+            for leaf, percent in zip(self.batched, counts * 100 / self.sizes, strict=True):
+                scores[id(leaf)] = float(percent)
+        for leaf in self.fallback:
+            scores[id(leaf)] = leaf.get_percent_match(frame)
+        self.scores = scores
+        return scores
+
+    def _score(self, reference: ReferenceFrame, scores: dict[int, float]) -> float:
+        if isinstance(reference, ReferenceFrameEnum):
+            return self._score(reference.value, scores)
+        if isinstance(reference, LoggingReferenceFrame):
+            percent_match = self._score(reference.delegate, scores)
+            reference.log_percent_match(percent_match)
+            return percent_match
+        if isinstance(reference, CompositeReferenceFrame):
+            children = [self._score(child, scores) for child in reference.frames]
+            match reference.behavior:
+                case CompositeReferenceFrame.Behavior.AND:
+                    return sum(children) / len(children)
+                case CompositeReferenceFrame.Behavior.OR:
+                    return min(children)
+        return scores[id(reference)]
+
+    def _matches(self, reference: ReferenceFrame, scores: dict[int, float], frame: Frame) -> bool:
+        if isinstance(reference, ReferenceFrameEnum):
+            return self._matches(reference.value, scores, frame)
+        if isinstance(reference, LoggingReferenceFrame):
+            reference.log_percent_match(self._score(reference.delegate, scores))
+            matches = self._matches(reference.delegate, scores, frame)
+            reference.log_matches(matches)
+            return matches
+        if isinstance(reference, CompositeReferenceFrame):
+            children = (self._matches(child, scores, frame) for child in reference.frames)
+            match reference.behavior:
+                case CompositeReferenceFrame.Behavior.AND:
+                    return all(children)
+                case CompositeReferenceFrame.Behavior.OR:
+                    return any(children)
+        if isinstance(reference, SimpleReferenceFrame):
+            return scores[id(reference)] < reference.threshold
+        return reference.matches(frame)
+
+    def get_percent_matches(self, frame: Frame) -> dict[ReferenceFrame, float]:
+        scores = self._leaf_scores(frame)
+        return {reference: self._score(reference, scores) for reference in self.references}
+
+    def matches(self, frame: Frame) -> dict[ReferenceFrame, bool]:
+        scores = self._leaf_scores(frame)
+        return {reference: self._matches(reference, scores, frame) for reference in self.references}
+
+    def first_match(self, frame: Frame) -> ReferenceFrame | None:
+        """Return the first reference (in batch order) matching the frame, if any"""
+        scores = self._leaf_scores(frame)
+        for reference in self.references:
+            if self._matches(reference, scores, frame):
+                return reference
+        return None
@@ -1,39 +1,131 @@
-import os
+import functools
 import threading
+import time
 from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import Final
 
 import cv2
+import numpy as np
 from loguru import logger
 
-from .frame import Frame
+from .frame import PREPARED_FRAME_CACHE, Frame, ReferenceFrame
+from .frame_batch import ReferenceFrameBatch
+from .mjpeg import JPEG_MAGIC, decode, decode_roi
+from .preview import Preview
+from .replay import ReplayCapture
+from .shared_frames import SharedFrameRing
+
+
+@dataclass(frozen=True)
+class CapturedFrame:
+    # 1-based, increases by one for every frame published by the grabber
+    seq: int
+    # time.monotonic() when the frame was read from the capture device (when it was due, for replays)
+    timestamp: float
+    # read-only view into the grabber's frame ring; see FrameGrabber.is_current
+    image: Frame
+
+
+@dataclass(frozen=True)
+class LazyCapturedFrame:
+    """A captured frame kept as the device's JPEG bytes and decoded only when asked for"""
+    seq: int
+    timestamp: float
+    jpeg: bytes
+
+    @functools.cached_property
+    def image(self) -> Frame:
+        image = decode(self.jpeg)
+        image.flags.writeable = False
+        return image
+
+    def decode(self, scale: int = 1) -> Frame:
+        """Decode at 1/scale (1, 2, 4 or 8); reduced scales are not cached"""
+        return self.image if scale == 1 else decode(self.jpeg, scale)
+
+    def decode_roi(self, x1: int, y1: int, x2: int, y2: int, scale: int = 1) -> Frame:
+        """Decode just a region, in full-resolution coordinates, at 1/scale"""
+        return decode_roi(self.jpeg, x1, y1, x2, y2, scale)
+
+
+@dataclass(frozen=True)
+class FrameMatch:
+    reference: ReferenceFrame
+    captured: CapturedFrame | LazyCapturedFrame
+
+    @property
+    def frame(self) -> Frame:
+        return self.captured.image
+
+    @property
+    def timestamp(self) -> float:
+        return self.captured.timestamp
 
 
 class FrameGrabber:
+    # upper bound on a single condition wait so Ctrl-C and stop() are noticed promptly
+    WAIT_SLICE: Final = 0.5
+
     def __init__(self,
-                 source: int | str,
+                 source: int | str | ReplayCapture,
                  width: int = 1280,
                  height: int = 720,
                  fps: int = 60,
                  imshow: bool = True,
-                 buffer_size: int = 30):
+                 buffer_size: int = 30,
+                 preview_fps: float = 15,
+                 shared_memory: bool = False,
+                 lazy_decode: bool = False):
         self.source: Final = source
         self.width: Final = width
         self.height: Final = height
         self.fps: Final = fps
         self.imshow: Final = imshow
+        # keep each frame as the device's JPEG bytes and only decode frames consumers look at
+        self.lazy_decode: Final = lazy_decode
+        if lazy_decode and shared_memory:
+            raise ValueError("lazy_decode frames are not decoded into shared memory")
 
-        self.video_capture: Final = cv2.VideoCapture(source)
+        # a ReplayCapture plays a recording at its original timing instead of a device
+        self.video_capture: Final = source if isinstance(source, ReplayCapture) else cv2.VideoCapture(source)
         self.video_capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter.fourcc(*'MJPG'))
         self.video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         self.video_capture.set(cv2.CAP_PROP_FPS, fps)
+        if lazy_decode:
+            # raw packets from FFmpeg (recorded streams), raw buffers from V4L2 devices
+            self.video_capture.set(cv2.CAP_PROP_FORMAT, -1)
+            if self.video_capture.get(cv2.CAP_PROP_FORMAT) != -1:
+                self.video_capture.set(cv2.CAP_PROP_CONVERT_RGB, 0)
 
         self.video_capture_thread: Final = threading.Thread(target=self.run)
         self.running: threading.Event = threading.Event()
 
+        # Frames are decoded into a fixed ring of preallocated buffers: buffer_size
+        # published frames plus the slot the capture thread is currently writing.
+        # With shared_memory the ring lives in a SharedFrameRing that a VisionPool's
+        # worker processes read from directly.
+        self.shared_ring: Final = SharedFrameRing.create(buffer_size + 1, height, width) if shared_memory else None
+        if self.shared_ring is not None:
+            ring, ring_seq = list(self.shared_ring.frames), self.shared_ring.seqs
+        elif lazy_decode:
+            ring, ring_seq = [], []
+        else:
+            ring = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(buffer_size + 1)]
+            ring_seq = [0] * len(ring)
+        self.ring: Final = ring
+        # sequence number held by each slot (0 while being written)
+        self.ring_seq: Final = ring_seq
+
         self.frame_buffer: Final = deque(maxlen=buffer_size)
         self.frame_buffer_lock: Final = threading.Lock()
+        # notified (under frame_buffer_lock) whenever a frame is published or capture stops
+        self.frame_available: Final = threading.Condition(self.frame_buffer_lock)
+        self.seq = 0
+
+        self.preview: Final = Preview(self, preview_fps) if imshow else None
 
     def __enter__(self):
         self.start()
@@ -45,49 +137,204 @@ class FrameGrabber:
     def start(self):
         self.running.clear()
         self.video_capture_thread.start()
+        if self.preview is not None:
+            self.preview.start()
 
     def stop(self):
         self.running.set()
+        with self.frame_available:
+            self.frame_available.notify_all()
+        if self.preview is not None:
+            self.preview.stop()
         self.video_capture_thread.join()
         self.video_capture.release()
+        if self.shared_ring is not None:
+            with self.frame_buffer_lock:
+                self.frame_buffer.clear()
+            self.ring.clear()
+            self.shared_ring.close(unlink=True)
 
     def run(self):
-        frames = 0
         while not self.running.is_set():
-            frame = self.read_frame()
-            if frame is None:
-                continue
+            if self.lazy_decode:
+                self.capture_jpeg()
+            else:
+                self.capture_frame()
 
-            with self.frame_buffer_lock:
-                self.frame_buffer.append(frame)
-
-            if self.imshow:
-                cv2.imshow('Frame Grabber', frame)
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('s'):
-                    filepath = os.path.join("frames", f'frame-{frames}.jpg')
-                    filepath = os.path.abspath(filepath)
-                    dirname = os.path.dirname(filepath)
-                    os.makedirs(dirname, exist_ok=True)
-                    cv2.imwrite(filepath, frame)
-                    frames += 1
-                elif key == ord('q'):
-                    self.running.set()
-                    break
+        with self.frame_available:
+            self.frame_available.notify_all()
+
+    def capture_frame(self):
+        slot = (self.seq + 1) % len(self.ring_seq)
+        with self.frame_buffer_lock:
+            self.ring_seq[slot] = 0
+        frame = self.read_frame(self.ring[slot])
+        if frame is None:
+            return
+        if frame is not self.ring[slot]:
+            # the device delivered a different size than requested; adopt it for this slot
+            self.ring[slot] = frame
+
+        timestamp = self.capture_timestamp()
+        image = frame.view()
+        image.flags.writeable = False
+        self.publish(CapturedFrame(self.seq + 1, timestamp, image), slot)
+
+    def capture_jpeg(self):
+        jpeg = self.read_jpeg()
+        if jpeg is not None:
+            self.publish(LazyCapturedFrame(self.seq + 1, self.capture_timestamp(), jpeg))
+
+    def publish(self, captured: CapturedFrame | LazyCapturedFrame, slot: int | None = None):
+        PREPARED_FRAME_CACHE.clear()
+        with self.frame_available:
+            self.seq = captured.seq
+            if slot is not None:
+                self.ring_seq[slot] = captured.seq
+            self.frame_buffer.append(captured)
+            self.frame_available.notify_all()
 
     @property
     def frame(self) -> Frame | None:
+        captured = self.captured_frame
+        # decoded outside the lock when frames are captured lazily
+        return captured.image if captured is not None else None
+
+    @property
+    def frames(self) -> list[Frame]:
+        """Copies of the buffered frames, oldest first, leaving out any that capture overwrote meanwhile"""
+        copies = (self.copy(captured) for captured in self.captured_frames)
+        return [image for image in copies if image is not None]
+
+    @property
+    def captured_frame(self) -> CapturedFrame | LazyCapturedFrame | None:
+        """The newest frame along with its sequence number and capture timestamp"""
         with self.frame_buffer_lock:
             return self.frame_buffer[-1] if self.frame_buffer else None
 
     @property
-    def frames(self) -> list[Frame]:
+    def captured_frames(self) -> list[CapturedFrame | LazyCapturedFrame]:
         with self.frame_buffer_lock:
             return list(self.frame_buffer)
 
-    def read_frame(self) -> Frame | None:
-        success, frame = self.video_capture.read()
-        if not success:
+    def is_current(self, captured: CapturedFrame | LazyCapturedFrame) -> bool:
+        """Whether the frame's ring slot still holds it (i.e. it has not been overwritten by capture)"""
+        if isinstance(captured, LazyCapturedFrame):
+            return True
+        with self.frame_buffer_lock:
+            return bool(self.ring_seq[captured.seq % len(self.ring_seq)] == captured.seq)
+
+    def copy(self, captured: CapturedFrame | LazyCapturedFrame) -> Frame | None:
+        """A writable copy of the frame that outlives the ring, or None if it was already overwritten"""
+        image = captured.image.copy()
+        return image if self.is_current(captured) else None
+
+    def _wait(self, find, timeout: float | None) -> CapturedFrame | LazyCapturedFrame | None:
+        """Wait (holding frame_buffer_lock) until find() returns a frame, capture stops or timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.frame_available:
+            while True:
+                captured = find()
+                if captured is not None:
+                    return captured
+                if self.running.is_set():
+                    return None
+                remaining = self.WAIT_SLICE if deadline is None else min(deadline - time.monotonic(), self.WAIT_SLICE)
+                if remaining <= 0:
+                    return None
+                self.frame_available.wait(remaining)
+
+    def next_frame(self, after_seq: int, timeout: float | None = None) -> CapturedFrame | LazyCapturedFrame | None:
+        """
+        Block until a frame newer than after_seq is published and return the newest
+        frame, or None on timeout or when capture stops.
+        """
+        def find() -> CapturedFrame | LazyCapturedFrame | None:
+            if self.frame_buffer and self.frame_buffer[-1].seq > after_seq:
+                return self.frame_buffer[-1]
+            return None
+
+        return self._wait(find, timeout)
+
+    def frame_after(self,
+                    timestamp: float | None = None,
+                    seq: int | None = None,
+                    timeout: float | None = None) -> CapturedFrame | LazyCapturedFrame | None:
+        """
+        Return the first frame captured after the given time.monotonic() timestamp
+        and/or sequence number, waiting for it if it has not been captured yet.
+        Returns None on timeout or when capture stops.
+        """
+        def find() -> CapturedFrame | LazyCapturedFrame | None:
+            for captured in self.frame_buffer:
+                if (timestamp is None or captured.timestamp > timestamp) and (seq is None or captured.seq > seq):
+                    return captured
+            return None
+
+        return self._wait(find, timeout)
+
+    def wait_for_any(self,
+                     references: Iterable[ReferenceFrame] | ReferenceFrameBatch,
+                     timeout: float | None = None,
+                     after: float | None = None) -> FrameMatch | None:
+        """
+        Evaluate the references once per new frame and return the first match, or
+        None on timeout or when capture stops. Evaluation starts with the current
+        frame, or with the first frame captured after the `after` timestamp so that
+        frames predating an input are never judged.
+        """
+        batch = references if isinstance(references, ReferenceFrameBatch) else ReferenceFrameBatch(references)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> float | None:
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        if after is not None:
+            captured = self.frame_after(timestamp=after, timeout=remaining())
+        else:
+            captured = self._wait(lambda: self.frame_buffer[-1] if self.frame_buffer else None, remaining())
+        while captured is not None:
+            reference = batch.first_match(captured.image)
+            # a frame overwritten mid-evaluation may have produced a torn result
+            if reference is not None and self.is_current(captured):
+                return FrameMatch(reference, captured)
+            captured = self.next_frame(captured.seq, remaining())
+        return None
+
+    def wait_for(self,
+                 reference: ReferenceFrame,
+                 timeout: float | None = None,
+                 after: float | None = None) -> FrameMatch | None:
+        return self.wait_for_any((reference,), timeout, after)
+
+    def capture_timestamp(self) -> float:
+        """When the frame just read was captured; replayed frames report the time they were due"""
+        if isinstance(self.video_capture, ReplayCapture):
+            return self.video_capture.timestamp
+        return time.monotonic()
+
+    def read_failed(self):
+        if isinstance(self.video_capture, ReplayCapture) and self.video_capture.finished:
+            logger.info(f'Replay of {self.video_capture.path} finished')
+            self.running.set()
+        else:
             logger.error('Failed to read frame')
+
+    def read_frame(self, image: Frame | None = None) -> Frame | None:
+        success, frame = self.video_capture.read(image=image)
+        if not success:
+            self.read_failed()
             return None
         return frame
+
+    def read_jpeg(self) -> bytes | None:
+        success, packet = self.video_capture.read()
+        if not success:
+            self.read_failed()
+            return None
+        jpeg = packet.tobytes()
+        if not jpeg.startswith(JPEG_MAGIC):
+            logger.error('Capture source does not deliver raw MJPEG frames; lazy_decode is not supported for it')
+            self.running.set()
+            return None
+        return jpeg
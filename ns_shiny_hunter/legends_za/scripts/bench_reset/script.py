@@ -1,30 +1,47 @@
-import time
-
-import cv2
+import functools
 
 from ns_controller.client import NsControllerClient
 from ns_controller.pb.ns_controller_pb2 import Button
 from ns_shiny_hunter.frame_grabber import FrameGrabber
-from .frames import BenchResetReferenceFrames
+from ns_shiny_hunter.shiny import ShinyDetector, ShinyFound
+from ns_shiny_hunter.state_machine import StateMachine, StateSpec, Transition
+from ns_shiny_hunter.telemetry import Telemetry
 from .state import State
 from ...frames import LegendsZAReferenceFrames
 
 
 class BenchReset:
-    def __init__(self, frame_grabber: FrameGrabber, controller: NsControllerClient, resets: int = 1):
+    def __init__(self,
+                 frame_grabber: FrameGrabber,
+                 controller: NsControllerClient,
+                 resets: int = 1,
+                 shiny_detector: ShinyDetector | None = None,
+                 telemetry: Telemetry | None = None):
         self.frame_grabber = frame_grabber
         self.controller = controller
         self.resets = resets
+        self.machine = StateMachine(frame_grabber, {
+            State.OVERWORLD: StateSpec(
+                enter=self.walk_to_bench,
+                repeat=functools.partial(controller.click, Button.A, post_delay=None),
+                transitions=(Transition(LegendsZAReferenceFrames.OVERWORLD, State.OVERWORLD, self.count_reset),),
+            ),
+        }, State.OVERWORLD, shiny_detector, telemetry)
+
+    def walk_to_bench(self):
+        print(f"Reset #{self.resets}...")
+        self.controller.set_stick(ls_y=-1, post_delay=0.2)
+        self.controller.clear()
+
+    def count_reset(self):
+        self.resets += 1
+        self.machine.count_reset()
 
     def run(self):
         try:
-            while True:
-                print(f"Reset #{self.resets}...")
-                self.controller.set_stick(ls_y=-1, post_delay=0.2)
-                self.controller.clear()
-
-                while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                    self.controller.click(Button.A)
-                self.resets += 1
+            self.machine.run()
+        except ShinyFound as e:
+            self.controller.clear()
+            print(f"\n{e} after {self.resets} resets!")
         except KeyboardInterrupt:
             print(f"\nExiting BenchReset after {self.resets} resets...")
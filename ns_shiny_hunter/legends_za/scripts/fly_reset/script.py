@@ -1,9 +1,13 @@
+import functools
 from typing import Final
 
 from ns_controller.client import NsControllerClient
 from ns_controller.pb.ns_controller_pb2 import Button
 from ns_shiny_hunter.frame_grabber import FrameGrabber
 from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
+from ns_shiny_hunter.shiny import ShinyDetector, ShinyFound
+from ns_shiny_hunter.state_machine import StateMachine, StateSpec, Transition
+from ns_shiny_hunter.telemetry import Telemetry
 from .state import State
 
 
@@ -18,35 +22,51 @@ class FlyReset:
                  frame_grabber: FrameGrabber,
                  controller: NsControllerClient,
                  state: State = State.OVERWORLD,
-                 resets: int = 1):
+                 resets: int = 1,
+                 shiny_detector: ShinyDetector | None = None,
+                 telemetry: Telemetry | None = None):
         self.action = action
         self.frame_grabber = frame_grabber
         self.controller = controller
-        self.state = state
         self.resets = resets
+        # states judge only frames captured after their input instead of padding with a fixed delay
+        self.machine = StateMachine(frame_grabber, {
+            State.OVERWORLD: StateSpec(
+                enter=lambda: print(f'Reset #{self.resets}...'),
+                repeat=functools.partial(controller.click, Button.PLUS, post_delay=None),
+                interval=1,
+                judge_current=False,
+                transitions=(Transition(LegendsZAReferenceFrames.OPEN_MAP, State.OPEN_MAP),),
+            ),
+            State.OPEN_MAP: StateSpec(
+                repeat=self.move_cursor,
+                interval=1,
+                judge_current=False,
+                transitions=(Transition(LegendsZAReferenceFrames.TRAVEL_HERE, State.TRAVEL_HERE),),
+            ),
+            State.TRAVEL_HERE: StateSpec(
+                repeat=functools.partial(controller.click, Button.A, post_delay=None),
+                judge_current=False,
+                transitions=(Transition(LegendsZAReferenceFrames.OVERWORLD, State.OVERWORLD, self.count_reset),),
+            ),
+        }, state, shiny_detector, telemetry)
+
+    @property
+    def state(self) -> State:
+        return self.machine.state
+
+    def move_cursor(self):
+        self.controller.set_stick(ls_x=self.action[0], ls_y=self.action[1], post_delay=self.action[2])
+        self.controller.set_stick(ls_x=0, ls_y=0, post_delay=None)
+
+    def count_reset(self):
+        self.resets += 1
+        self.machine.count_reset()
 
     def run(self):
         try:
-            while True:
-                match self.state:
-                    case State.OVERWORLD:
-                        print('State.OVERWORLD')
-                        print(f'Reset #{self.resets}...')
-                        self.controller.click([Button.PLUS], down=0.1, post_delay=1)
-                        if LegendsZAReferenceFrames.OPEN_MAP.matches(self.frame_grabber.frame):
-                            self.state = State.OPEN_MAP
-                    case State.OPEN_MAP:
-                        print('State.OPEN_MAP')
-                        self.controller.set_stick(ls_x=self.action[0], ls_y=self.action[1], post_delay=self.action[2])
-                        self.controller.set_stick(ls_x=0, ls_y=0, post_delay=1)
-
-                        if LegendsZAReferenceFrames.TRAVEL_HERE.matches(self.frame_grabber.frame):
-                            self.state = State.TRAVEL_HERE
-                    case State.TRAVEL_HERE:
-                        print('State.TRAVEL_HERE')
-                        self.controller.click([Button.A], down=0.1, post_delay=0.1)
-                        if LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                            self.state = State.OVERWORLD
-                            self.resets += 1
+            self.machine.run()
+        except ShinyFound as e:
+            print(f"\n{e} after {self.resets} resets!")
         except KeyboardInterrupt:
             print(f"\nExiting FlyReset after {self.resets} resets...")
@@ -1,7 +1,11 @@
+import pathlib
+from types import MappingProxyType
 from typing import Final
 
 from ns_shiny_hunter.frame import ReferenceFrameEnum, SimpleFrameProcessor, SimpleReferenceFrame, BlurParams, \
     LoggingReferenceFrame
+from ns_shiny_hunter.menu import MenuCursor
+from ns_shiny_hunter.ocr import PSM_AUTO, OcrField
 
 ATTACK_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from_points(
     p1=(1086, 579),
@@ -9,6 +13,9 @@ ATTACK_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from_points(
     blur_params=None,
     threshold_params=None
 )
+# only checked for being empty; read exactly as before the OCR engine existed (raw ROI, default page
+# segmentation), since when it comes back empty decides when ZL is re-pressed
+ATTACK_OCR_FIELD: Final = OcrField(ATTACK_FRAME_PROCESSOR, psm=PSM_AUTO, binarize=False)
 DIALOG_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from_points(
     p1=(318, 580),
     p2=(964, 668),
@@ -23,6 +30,7 @@ POKEMON_CENTER_DIALOG_OPTIONS_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from
     blur_params=None,
     threshold_params=None
 )
+POKEMON_CENTER_DIALOG_OPTIONS: Final = MenuCursor(POKEMON_CENTER_DIALOG_OPTIONS_FRAME_PROCESSOR, options=3)
 
 ITEM_NAME_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from_points(
     p1=(134, 253),
@@ -53,6 +61,15 @@ ACCEPT_OFFER_FRAME_PROCESSOR: Final = SimpleFrameProcessor.from_points(
     threshold_params=None
 )
 
+# fields read together from the sell-quantity screen
+SELL_TEXT_FIELDS: Final = MappingProxyType({
+    "item-name": OcrField(ITEM_NAME_FRAME_PROCESSOR),
+    "item-quantity": OcrField(ITEM_QUANTITY_FRAME_PROCESSOR),
+    "quantity-to-sell": OcrField(QUANTITY_TO_SELL_FRAME_PROCESSOR),
+})
+# the text of SELL_TEXT_FIELDS on the shipped captures, for training and checking the glyph reader
+SELL_TEXT_LABELS: Final = pathlib.Path(__file__).parent / "frames" / "labels.json"
+
 
 class SushiHighRollerReferenceFrames(ReferenceFrameEnum):
     ENTRANCE_1 = SimpleReferenceFrame.create_from_file(
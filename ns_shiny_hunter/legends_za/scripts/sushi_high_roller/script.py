@@ -1,212 +1,198 @@
+import functools
 import time
-from types import MappingProxyType
 from typing import Final
 
-import cv2
-import numpy as np
-import pytesseract
+from loguru import logger
 
 from ns_controller.client import NsControllerClient
 from ns_controller.pb.ns_controller_pb2 import Button
-from ns_shiny_hunter.frame import Frame
 from ns_shiny_hunter.frame_grabber import FrameGrabber
 from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
 from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames import SushiHighRollerReferenceFrames, \
-    ATTACK_FRAME_PROCESSOR, POKEMON_CENTER_DIALOG_OPTIONS_FRAME_PROCESSOR
+    ATTACK_OCR_FIELD, POKEMON_CENTER_DIALOG_OPTIONS, SELL_TEXT_FIELDS
 from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.state import State
+from ns_shiny_hunter.ocr import OcrEngine
+from ns_shiny_hunter.state_machine import StateMachine, StateSpec, Transition
+from ns_shiny_hunter.telemetry import Telemetry
 
 
 class SushiHighRoller:
-    def __init__(self, frame_grabber: FrameGrabber, controller: NsControllerClient, state: State = State.ENTRANCE_1):
+    def __init__(self,
+                 frame_grabber: FrameGrabber,
+                 controller: NsControllerClient,
+                 state: State = State.ENTRANCE_1,
+                 telemetry: Telemetry | None = None,
+                 log_sales: bool = False):
         self.frame_grabber = frame_grabber
         self.controller = controller
-        self.state_handlers: Final = MappingProxyType({
-            State.ENTRANCE_1: self.state_handler_entrance,
-            State.ENTRANCE_2: self.state_handler_entrance,
-            State.ENTRANCE_CONFIRMATION: self.state_handler_entrance_confirmation,
-            State.FOLLOW_ME: self.state_handler_follow_me,
-            State.BATTLE: self.state_handler_battle,
-            State.OUTCOME_SUCCESS: self.state_handler_outcome,
-            State.OUTCOME_FAILURE: self.state_handler_outcome,
-            State.CANNOT_AFFORD: self.state_handler_cannot_afford,
-            State.FLY_TO_POKEMON_CENTER: self.state_handler_fly_to_pokemon_center,
-            State.POKEMON_CENTER_DIALOG: self.state_handler_pokemon_center_dialog,
-            State.FLY_TO_SUSHI_HIGH_ROLLER: self.state_handler_fly_to_sushi_high_roller,
-        })
-        self.state = state
+        # read each sale off the screen for the debug log; a blocking OCR pass per item
+        self.log_sales = log_sales
+        self.ocr: Final = OcrEngine()
+
+        frames = SushiHighRollerReferenceFrames
+        press_a = functools.partial(controller.click, Button.A, post_delay=None)
+        press_plus = functools.partial(controller.click, Button.PLUS, post_delay=None)
+        self.machine = StateMachine(frame_grabber, {
+            State.ENTRANCE_1: StateSpec(
+                repeat=self.step_up_to_entrance,
+                judge_current=False,
+                transitions=(Transition(frames.ENTRANCE_CONFIRMATION, State.ENTRANCE_CONFIRMATION),),
+            ),
+            State.ENTRANCE_2: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(Transition(frames.ENTRANCE_CONFIRMATION, State.ENTRANCE_CONFIRMATION),),
+            ),
+            State.ENTRANCE_CONFIRMATION: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(
+                    Transition(frames.CANNOT_AFFORD, State.CANNOT_AFFORD),
+                    Transition(frames.FOLLOW_ME, State.FOLLOW_ME),
+                ),
+            ),
+            State.FOLLOW_ME: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(Transition(frames.BATTLE, State.BATTLE),),
+            ),
+            State.BATTLE: StateSpec(
+                repeat=self.attack,
+                judge_current=False,
+                transitions=(
+                    Transition(frames.OUTCOME_FAILURE, State.OUTCOME_FAILURE, controller.clear),
+                    Transition(frames.OUTCOME_SUCCESS, State.OUTCOME_SUCCESS, controller.clear),
+                ),
+            ),
+            State.OUTCOME_FAILURE: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(Transition(frames.ENTRANCE_2, State.ENTRANCE_2, self.count_battle),),
+            ),
+            State.OUTCOME_SUCCESS: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(Transition(frames.ENTRANCE_2, State.ENTRANCE_2, self.count_battle),),
+            ),
+            State.CANNOT_AFFORD: StateSpec(
+                repeat=press_a,
+                judge_current=False,
+                transitions=(Transition(frames.ENTRANCE_2, State.FLY_TO_POKEMON_CENTER),),
+            ),
+            State.FLY_TO_POKEMON_CENTER: StateSpec(
+                repeat=press_plus,
+                interval=0.5,
+                transitions=(Transition(LegendsZAReferenceFrames.OPEN_MAP, State.TRAVEL_TO_POKEMON_CENTER,
+                                        self.point_at_pokemon_center),),
+            ),
+            State.TRAVEL_TO_POKEMON_CENTER: StateSpec(
+                repeat=press_a,
+                transitions=(Transition(LegendsZAReferenceFrames.OVERWORLD, State.APPROACH_POKEMON_CENTER_COUNTER,
+                                        self.run_forward),),
+            ),
+            State.APPROACH_POKEMON_CENTER_COUNTER: StateSpec(
+                transitions=(Transition(LegendsZAReferenceFrames.PRESS_A_TO_TALK, State.POKEMON_CENTER_DIALOG,
+                                        controller.clear),),
+            ),
+            State.POKEMON_CENTER_DIALOG: StateSpec(
+                enter=self.open_sell_menu,
+                repeat=functools.partial(controller.click, Button.R, post_delay=None),
+                transitions=(Transition(frames.SELL_TREASURES, State.SELL_TREASURES),),
+            ),
+            State.SELL_TREASURES: StateSpec(
+                repeat=self.sell_treasure,
+                transitions=(Transition(frames.THIS_POCKET_IS_EMPTY, State.LEAVE_POKEMON_CENTER),),
+            ),
+            State.LEAVE_POKEMON_CENTER: StateSpec(
+                repeat=functools.partial(controller.click, Button.B, post_delay=None),
+                judge_current=False,
+                transitions=(Transition(LegendsZAReferenceFrames.OVERWORLD, State.FLY_TO_SUSHI_HIGH_ROLLER),),
+            ),
+            State.FLY_TO_SUSHI_HIGH_ROLLER: StateSpec(
+                repeat=press_plus,
+                interval=0.5,
+                transitions=(Transition(LegendsZAReferenceFrames.OPEN_MAP, State.TRAVEL_TO_SUSHI_HIGH_ROLLER,
+                                        self.point_at_sushi_high_roller),),
+            ),
+            State.TRAVEL_TO_SUSHI_HIGH_ROLLER: StateSpec(
+                repeat=press_a,
+                interval=0.5,
+                transitions=(Transition(LegendsZAReferenceFrames.OVERWORLD, State.APPROACH_SUSHI_HIGH_ROLLER,
+                                        self.run_forward),),
+            ),
+            State.APPROACH_SUSHI_HIGH_ROLLER: StateSpec(
+                transitions=(Transition(LegendsZAReferenceFrames.PRESS_A_TO_ENTER, State.ENTER_SUSHI_HIGH_ROLLER,
+                                        controller.clear),),
+            ),
+            State.ENTER_SUSHI_HIGH_ROLLER: StateSpec(
+                repeat=press_a,
+                transitions=(Transition(frames.ENTRANCE_1, State.ENTRANCE_1),),
+            ),
+        }, state, telemetry=telemetry)
+
+    @property
+    def state(self) -> State:
+        return self.machine.state
 
     def run(self):
         try:
-            while True:
-                state_handler = self.state_handlers.get(self.state, None)
-                if state_handler is None:
-                    print(f"No handler for state: {self.state}")
-                    break
-                state_handler()
+            self.machine.run()
         except KeyboardInterrupt:
             print(f"\nExiting SushiHighRoller script...")
             # self.controller.click([Button.HOME], down=1.5)
             # self.controller.click([Button.A])
+        finally:
+            self.ocr.close()
 
-    def state_handler_entrance(self):
-        print(f'State.ENTRANCE_1 | State.ENTRANCE_2')
-        if self.state == State.ENTRANCE_1:
-            self.controller.set_stick(ls_x=1, post_delay=0.25)
-            self.controller.set_stick(ls_x=0, post_delay=0.1)
-        self.controller.click(Button.A)
-
-        if SushiHighRollerReferenceFrames.ENTRANCE_CONFIRMATION.matches(self.frame_grabber.frame):
-            self.state = State.ENTRANCE_CONFIRMATION
-
-    def state_handler_entrance_confirmation(self):
-        print('State.ENTRANCE_CONFIRMATION')
-        self.controller.click(Button.A)
-
-        frame = self.frame_grabber.frame
-        if SushiHighRollerReferenceFrames.CANNOT_AFFORD.matches(frame):
-            self.state = State.CANNOT_AFFORD
-        elif SushiHighRollerReferenceFrames.FOLLOW_ME.matches(frame):
-            self.state = State.FOLLOW_ME
-
-    def state_handler_follow_me(self):
-        print('State.FOLLOW_ME')
-        self.controller.click(Button.A)
-        if SushiHighRollerReferenceFrames.BATTLE.matches(self.frame_grabber.frame):
-            self.state = State.BATTLE
+    def count_battle(self):
+        # a finished battle is this script's unit of progress
+        self.machine.count_reset()
+
+    def step_up_to_entrance(self):
+        self.controller.set_stick(ls_x=1, post_delay=0.25)
+        self.controller.set_stick(ls_x=0, post_delay=0.1)
+        self.controller.click(Button.A, post_delay=None)
 
-    def state_handler_battle(self):
-        print('State.BATTLE')
+    def attack(self):
         if SushiHighRollerReferenceFrames.BATTLE.matches(self.frame_grabber.frame):
-            frame = ATTACK_FRAME_PROCESSOR.prepare_frame(self.frame_grabber.frame)
-            text = pytesseract.image_to_string(frame)
-            text = text.strip().lower()
+            text = self.ocr.read(self.frame_grabber.frame, ATTACK_OCR_FIELD).lower()
             print(f'> Detected attack: "{text}"')
             if text == "":
                 self.controller.release(Button.ZL)
                 self.controller.press(Button.ZL)
                 time.sleep(0.5)
-        self.controller.click(Button.A)
-
-        frame = self.frame_grabber.frame
-        if SushiHighRollerReferenceFrames.OUTCOME_FAILURE.matches(frame):
-            self.state = State.OUTCOME_FAILURE
-            self.controller.clear()
-        elif SushiHighRollerReferenceFrames.OUTCOME_SUCCESS.matches(frame):
-            self.state = State.OUTCOME_SUCCESS
-            self.controller.clear()
-
-    def state_handler_outcome(self):
-        print('State.OUTCOME_FAILURE | State.OUTCOME_SUCCESS')
-        self.controller.click(Button.A)
-        if SushiHighRollerReferenceFrames.ENTRANCE_2.matches(self.frame_grabber.frame):
-            self.state = State.ENTRANCE_2
-
-    def state_handler_cannot_afford(self):
-        print('State.CANNOT_AFFORD')
-        while True:
-            self.controller.click(Button.A)
-            if SushiHighRollerReferenceFrames.ENTRANCE_2.matches(self.frame_grabber.frame):
-                self.state = State.FLY_TO_POKEMON_CENTER
-                break
-
-    def state_handler_fly_to_pokemon_center(self):
-        print('State.FLY_TO_POKEMON_CENTER')
-        while not LegendsZAReferenceFrames.OPEN_MAP.matches(self.frame_grabber.frame):
-            self.controller.click(Button.PLUS, post_delay=0.5)
+        self.controller.click(Button.A, post_delay=None)
+
+    def point_at_pokemon_center(self):
         # move cursor to nearest Pokemon Center
         self.controller.set_stick(ls_x=0.05, ls_y=0.8, post_delay=0.3)
         self.controller.clear()
 
-        while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-            self.controller.click(Button.A)
+    def point_at_sushi_high_roller(self):
+        # move cursor to Sushi High Roller
+        self.controller.set_stick(ls_x=-0.05, ls_y=-0.8, post_delay=0.3)
+        self.controller.clear(post_delay=0.5)
 
+    def run_forward(self):
         self.controller.set_stick(ls_y=1, post_delay=0.1)
         self.controller.click(Button.B)
-        while True:
-            if LegendsZAReferenceFrames.PRESS_A_TO_TALK.matches(self.frame_grabber.frame):
-                self.state = State.POKEMON_CENTER_DIALOG
-                self.controller.clear()
-                break
-            time.sleep(0.1)
-
-    def state_handler_pokemon_center_dialog(self):
+
+    def open_sell_menu(self):
         def select_option(option_index: int):
-            while True:
-                frame = POKEMON_CENTER_DIALOG_OPTIONS_FRAME_PROCESSOR.prepare_frame(self.frame_grabber.frame)
-                if self.detect_highlighted_option(frame, 3) == option_index:
-                    self.controller.click(Button.A)
-                    break
-                self.controller.click(Button.DPAD_DOWN)
-
-        def sell_treasures():
-            while True:
-                if SushiHighRollerReferenceFrames.THIS_POCKET_IS_EMPTY.matches(self.frame_grabber.frame):
-                    break
-                self.controller.click(Button.A, post_delay=0.5)  # select item
-                self.controller.click(Button.DPAD_DOWN, post_delay=0.5)  # select max quantity
-                self.controller.click(Button.A, post_delay=0.5)  # offer items
-                self.controller.click(Button.A, post_delay=0.5)  # accept offer
-                self.controller.click(Button.A, post_delay=0.5)  # ack receipt
-
-        print('State.POKEMON_CENTER_DIALOG')
+            while not POKEMON_CENTER_DIALOG_OPTIONS.select(self.controller, self.frame_grabber, option_index):
+                print(f'> Failed to select option {option_index}, retrying...')
+
         self.controller.click(Button.A, post_delay=1.5)
         self.controller.click(Button.A, post_delay=0.5)
-
         select_option(1)  # select "I'd like to do some shopping"
         select_option(1)  # select "I'd like to sell"
 
-        while not SushiHighRollerReferenceFrames.SELL_TREASURES.matches(self.frame_grabber.frame):
-            self.controller.click(Button.R)
-
-        sell_treasures()
-        while True:
-            self.controller.click(Button.B)
-            if LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                self.state = State.FLY_TO_SUSHI_HIGH_ROLLER
-                break
-
-    def state_handler_fly_to_sushi_high_roller(self):
-        print('State.FLY_TO_SUSHI_HIGH_ROLLER')
-        while not LegendsZAReferenceFrames.OPEN_MAP.matches(self.frame_grabber.frame):
-            self.controller.click(Button.PLUS, post_delay=0.5)
-        # move cursor to Sushi High Roller
-        self.controller.set_stick(ls_x=-0.05, ls_y=-0.8, post_delay=0.3)
-        self.controller.clear(post_delay=0.5)
-
-        while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-            self.controller.click(Button.A, post_delay=0.5)
-
-        self.controller.set_stick(ls_y=1, post_delay=0.1)
-        self.controller.click(Button.B)
-
-        while not LegendsZAReferenceFrames.PRESS_A_TO_ENTER.matches(self.frame_grabber.frame):
-            time.sleep(0.1)
-        self.controller.clear()
-
-        while not SushiHighRollerReferenceFrames.ENTRANCE_1.matches(self.frame_grabber.frame):
-            self.controller.click(Button.A)
-        self.state = State.ENTRANCE_1
-
-    # Returns one of the three option strings
-    @staticmethod
-    def detect_highlighted_option(frame: Frame, n_options: int) -> int:
-        # --- 2) Mask "white" (selected row background) in HSV ---
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        white_lo = np.array([0, 0, 210], np.uint8)  # low saturation, high value
-        white_hi = np.array([179, 70, 255], np.uint8)
-        white_mask = cv2.inRange(hsv, white_lo, white_hi)
-
-        # Small cleanups (optional, but helps on video)
-        k = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        white_mask = cv2.morphologyEx(white_mask, cv2.MORPH_OPEN, k)
-        white_mask = cv2.morphologyEx(white_mask, cv2.MORPH_CLOSE, k)
-
-        # --- 3) Split panel into equal-height bands and score by white coverage ---
-        h, w = frame.shape[:2]
-        bands = np.linspace(0, h, n_options + 1).astype(int)
-        white_scores = []
-        for i in range(n_options):
-            ys, ye = bands[i], bands[i + 1]
-            band = white_mask[ys:ye, :]
-            white_scores.append(np.count_nonzero(band) / band.size)
-        return int(np.argmax(white_scores))
+    def sell_treasure(self):
+        self.controller.click(Button.A, post_delay=0.5)  # select item
+        self.controller.click(Button.DPAD_DOWN, post_delay=0.5)  # select max quantity
+        if self.log_sales:
+            fields = self.ocr.read_all(self.frame_grabber.frame, SELL_TEXT_FIELDS)
+            logger.debug(f'Selling {fields["quantity-to-sell"]}/{fields["item-quantity"]} {fields["item-name"]}')
+        self.controller.click(Button.A, post_delay=0.5)  # offer items
+        self.controller.click(Button.A, post_delay=0.5)  # accept offer
+        self.controller.click(Button.A, post_delay=0.5)  # ack receipt
@@ -12,5 +12,12 @@ class State(StrEnum):
     OUTCOME_SUCCESS = auto()
     CANNOT_AFFORD = auto()
     FLY_TO_POKEMON_CENTER = auto()
+    TRAVEL_TO_POKEMON_CENTER = auto()
+    APPROACH_POKEMON_CENTER_COUNTER = auto()
     POKEMON_CENTER_DIALOG = auto()
+    SELL_TREASURES = auto()
+    LEAVE_POKEMON_CENTER = auto()
     FLY_TO_SUSHI_HIGH_ROLLER = auto()
+    TRAVEL_TO_SUSHI_HIGH_ROLLER = auto()
+    APPROACH_SUSHI_HIGH_ROLLER = auto()
+    ENTER_SUSHI_HIGH_ROLLER = auto()
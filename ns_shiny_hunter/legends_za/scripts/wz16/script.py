@@ -1,43 +1,64 @@
-import time
+import functools
 
 from ns_controller.client import NsControllerClient
 from ns_controller.pb.ns_controller_pb2 import Button
 from ns_shiny_hunter.frame_grabber import FrameGrabber
 from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
 from ns_shiny_hunter.legends_za.scripts.wz16.frames import WildZone16ReferenceFrames
+from ns_shiny_hunter.shiny import ShinyDetector, ShinyFound
+from ns_shiny_hunter.state_machine import StateMachine, StateSpec, Transition
+from ns_shiny_hunter.telemetry import Telemetry
+from .state import State
 
 
 class WildZone16:
-    def __init__(self, frame_grabber: FrameGrabber, controller: NsControllerClient, resets: int = 1):
+    def __init__(self,
+                 frame_grabber: FrameGrabber,
+                 controller: NsControllerClient,
+                 resets: int = 1,
+                 shiny_detector: ShinyDetector | None = None,
+                 telemetry: Telemetry | None = None):
         self.frame_grabber = frame_grabber
         self.controller = controller
         self.resets = resets
+        overworld = LegendsZAReferenceFrames.OVERWORLD
+        self.machine = StateMachine(frame_grabber, {
+            State.OVERWORLD: StateSpec(
+                enter=lambda: print(f"Reset #{self.resets}..."),
+                transitions=(Transition(overworld, State.APPROACH_ENTRANCE, self.run_to_entrance),),
+            ),
+            State.APPROACH_ENTRANCE: StateSpec(
+                transitions=(Transition(WildZone16ReferenceFrames.PRESS_A_TO_ENTER, State.ENTER_WILD_ZONE,
+                                        self.enter_wild_zone),),
+            ),
+            State.ENTER_WILD_ZONE: StateSpec(
+                repeat=functools.partial(controller.click, Button.L, post_delay=None),
+                transitions=(Transition(overworld, State.FLY_BACK, functools.partial(controller.click, Button.PLUS)),),
+            ),
+            State.FLY_BACK: StateSpec(
+                repeat=functools.partial(controller.click, Button.A, post_delay=None),
+                transitions=(Transition(overworld, State.OVERWORLD, self.count_reset),),
+            ),
+        }, State.OVERWORLD, shiny_detector, telemetry)
 
-    def run(self):
-        try:
-            while True:
-                print(f"Reset #{self.resets}...")
-                while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                    time.sleep(0.1)
-
-                self.controller.set_stick(ls_y=1, post_delay=0.3)
-                self.controller.click(Button.B)
-
-                while not WildZone16ReferenceFrames.PRESS_A_TO_ENTER.matches(self.frame_grabber.frame):
-                    time.sleep(0.1)
-                self.controller.clear()
+    def run_to_entrance(self):
+        self.controller.set_stick(ls_y=1, post_delay=0.3)
+        self.controller.click(Button.B)
 
-                self.controller.click(Button.A)
+    def enter_wild_zone(self):
+        self.controller.clear()
+        self.controller.click(Button.A)
 
-                while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                    self.controller.click(Button.L)
+    def count_reset(self):
+        self.resets += 1
+        self.machine.count_reset()
 
-                self.controller.click(Button.PLUS)
-
-                while not LegendsZAReferenceFrames.OVERWORLD.matches(self.frame_grabber.frame):
-                    self.controller.click(Button.A)
-
-                self.resets += 1
+    def run(self):
+        try:
+            self.machine.run()
+        except ShinyFound as e:
+            self.controller.clear()
+            print(f"\n{e} after {self.resets} resets!")
         except KeyboardInterrupt:
             print(f"\nCompleted {self.resets} resets.")
-            raise
\ No newline at end of file
+            raise
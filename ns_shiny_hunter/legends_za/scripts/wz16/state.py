@@ -0,0 +1,8 @@
+from enum import StrEnum, auto
+
+
+class State(StrEnum):
+    OVERWORLD = auto()
+    APPROACH_ENTRANCE = auto()
+    ENTER_WILD_ZONE = auto()
+    FLY_BACK = auto()
@@ -0,0 +1,7 @@
+from enum import StrEnum, auto
+
+
+class State(StrEnum):
+    OVERWORLD = auto()
+    ENTER_WILD_ZONE = auto()
+    FLY_BACK = auto()
@@ -0,0 +1,21 @@
+from ns_shiny_hunter.shiny import ShinyIndicator
+
+# white-gold star bursts around a shiny as it spawns, looked for across the field of
+# view right of the minimap and above the party bar. Calibrated against the shipped
+# overworld captures (see tests/test_shiny.py): their rises above the bench-reset
+# baseline stay under 0.0023, and min_fraction keeps 50% headroom above that. Menus
+# and map screens light 17-49% of the region, well above max_fraction.
+SPARKLE = ShinyIndicator(
+    "sparkle", 220, 0, 1280, 440,
+    lower=(10, 0, 235), upper=(40, 120, 255),
+    min_fraction=0.004, max_fraction=0.1, relative=True, stride=4
+)
+# red star beside a locked-on Pokémon's name; none of the shipped captures has a
+# single pixel in range, so min_fraction is bounded by the star's size alone
+SHINY_ICON = ShinyIndicator(
+    "shiny-icon", 560, 20, 720, 60,
+    lower=(0, 150, 150), upper=(8, 255, 255),
+    min_fraction=0.05
+)
+
+LEGENDS_ZA_SHINY_INDICATORS = (SPARKLE, SHINY_ICON)
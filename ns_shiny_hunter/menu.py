@@ -0,0 +1,100 @@
+import time
+from typing import Final
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from ns_controller.client import NsControllerClient
+from ns_controller.pb.ns_controller_pb2 import Button
+
+from .frame import Frame, SimpleFrameProcessor
+from .frame_grabber import FrameGrabber
+
+
+class MenuCursor:
+    """
+    Locates the highlighted option of a vertical menu whose options split the
+    processor's ROI into equal-height bands, by the share of each band in the
+    highlight colour range (HSV), and moves the cursor to a given option.
+    """
+
+    def __init__(self,
+                 processor: SimpleFrameProcessor,
+                 options: int,
+                 lower: tuple[int, int, int] = (0, 0, 210),
+                 upper: tuple[int, int, int] = (179, 70, 255),
+                 kernel_size: tuple[int, int] = (5, 5),
+                 wraps: bool = False):
+        self.processor: Final = processor
+        self.options: Final = options
+        self.lower: Final = np.array(lower, dtype=np.uint8)
+        self.upper: Final = np.array(upper, dtype=np.uint8)
+        # morphology cleans up video noise in the highlight mask
+        self.kernel: Final = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, kernel_size)
+        # whether moving past the last option returns to the first
+        self.wraps: Final = wraps
+        self.position: int | None = None
+
+    def coverage(self, frame: Frame) -> np.ndarray:
+        """Fraction of each option's band that is in the highlight colour range"""
+        hsv = cv2.cvtColor(self.processor.prepare_frame(frame), cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, self.lower, self.upper)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+        h, w = mask.shape
+        bands = np.linspace(0, h, self.options + 1).astype(int)
+        counts = np.add.reduceat(np.count_nonzero(mask, axis=1), bands[:-1])
+        return counts / (np.diff(bands) * w)
+
+    def detect(self, frame: Frame) -> int:
+        """Index of the highlighted option, remembered as the cursor's last known position"""
+        self.position = int(np.argmax(self.coverage(frame)))
+        return self.position
+
+    def presses(self, start: int, target: int) -> tuple[Button, int]:
+        """The DPAD direction and number of presses that move the cursor from start to target"""
+        delta = target - start
+        if self.wraps:
+            # shortest signed distance around the menu
+            delta = (delta + self.options // 2) % self.options - self.options // 2
+        return (Button.DPAD_DOWN, delta) if delta >= 0 else (Button.DPAD_UP, -delta)
+
+    def select(self,
+               controller: NsControllerClient,
+               frame_grabber: FrameGrabber,
+               target: int,
+               settle: float = 1.0,
+               attempts: int = 3) -> bool:
+        """
+        Move the cursor to the target option and press A. The cursor is located once,
+        the exact number of DPAD presses is sent, and the cursor is then tracked on new
+        frames until it settles on the target (re-planning from wherever it stopped).
+        Returns False if the target was not reached within the given attempts.
+        """
+        captured = frame_grabber.next_frame(0)
+        if captured is None:
+            return False
+        position = self.detect(captured.image)
+        for _ in range(attempts):
+            if position == target:
+                controller.click(Button.A)
+                return True
+            button, count = self.presses(position, target)
+            for _ in range(count):
+                controller.click(button)
+
+            after = time.monotonic()
+            deadline = after + settle
+            captured = frame_grabber.frame_after(timestamp=after, timeout=settle)
+            while captured is not None and self.detect(captured.image) != target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                captured = frame_grabber.next_frame(captured.seq, remaining)
+            position = self.position
+            logger.debug(f"Menu cursor at {position} after {count} x {Button.Name(button)}, target {target}")
+        if position == target:
+            controller.click(Button.A)
+            return True
+        return False
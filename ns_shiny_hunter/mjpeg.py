@@ -0,0 +1,80 @@
+from typing import Final
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from .frame import Frame
+
+try:
+    from turbojpeg import TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+JPEG_MAGIC: Final = b"\xff\xd8"
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding, skipping most of the IDCT work
+SCALE_FLAGS: Final = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+# MCU (width, height) by turbojpeg subsampling: 444, 422, 420, gray, 440, 411
+MCU_SIZES: Final = ((8, 8), (16, 8), (16, 16), (8, 8), (8, 16), (32, 8))
+
+_turbo_jpeg = None
+_turbo_jpeg_unavailable = False
+
+
+def turbo_jpeg():
+    """
+    Shared TurboJPEG instance, or None when PyTurboJPEG (the `jpeg` extra) or
+    libturbojpeg is unavailable, which is logged once
+    """
+    global _turbo_jpeg, _turbo_jpeg_unavailable
+    if _turbo_jpeg is None and not _turbo_jpeg_unavailable:
+        if TurboJPEG is None:
+            reason = "PyTurboJPEG is not installed (install the 'jpeg' extra)"
+        else:
+            try:
+                _turbo_jpeg = TurboJPEG()
+                return _turbo_jpeg
+            except (OSError, RuntimeError) as e:
+                reason = f"libturbojpeg could not be loaded: {e}"
+        _turbo_jpeg_unavailable = True
+        logger.warning(f"{reason}; ROI decodes fall back to decoding whole frames")
+    return _turbo_jpeg
+
+
+def decode(jpeg: bytes, scale: int = 1) -> Frame:
+    flag = SCALE_FLAGS.get(scale)
+    if flag is None:
+        raise ValueError(f"Unsupported decode scale 1/{scale}, expected one of {sorted(SCALE_FLAGS)}")
+    frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), flag)
+    if frame is None:
+        raise ValueError("Unable to decode JPEG frame")
+    return frame
+
+
+def decode_roi(jpeg: bytes, x1: int, y1: int, x2: int, y2: int, scale: int = 1) -> Frame:
+    """
+    Decode only a region of a JPEG, given in full-resolution coordinates, at 1/scale.
+
+    With libturbojpeg the region is first cut out losslessly along MCU boundaries,
+    so only the blocks covering it are entropy-decoded and transformed; without
+    it the whole frame is decoded and cropped.
+    """
+    tj = turbo_jpeg()
+    if tj is None:
+        return decode(jpeg, scale)[y1 // scale:y2 // scale, x1 // scale:x2 // scale]
+
+    width, height, subsample, _ = tj.decode_header(jpeg)
+    mcu_width, mcu_height = MCU_SIZES[subsample]
+    crop_x = x1 - x1 % mcu_width
+    crop_y = y1 - y1 % mcu_height
+    cropped = tj.crop(jpeg, crop_x, crop_y, min(x2, width) - crop_x, min(y2, height) - crop_y)
+    frame = tj.decode(cropped, scaling_factor=(1, scale))
+    x = (x1 - crop_x) // scale
+    y = (y1 - crop_y) // scale
+    return frame[y:y + (y2 - y1) // scale, x:x + (x2 - x1) // scale]
@@ -0,0 +1,197 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Final
+
+import cv2
+import numpy as np
+import pytesseract
+from loguru import logger
+
+from .frame import Frame, FrameProcessor
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# tesseract page segmentation modes used for UI text
+PSM_AUTO: Final = 3
+PSM_SINGLE_BLOCK: Final = 6
+PSM_SINGLE_LINE: Final = 7
+PSM_SINGLE_WORD: Final = 8
+
+# background rows between (and around) fields stitched into one image
+STITCH_PADDING: Final = 16
+
+
+@dataclass(frozen=True)
+class OcrField:
+    """A text region and how tesseract should read it"""
+    processor: FrameProcessor
+    # characters tesseract may output; None allows any
+    whitelist: str | None = None
+    psm: int = PSM_SINGLE_LINE
+    # Otsu-threshold the ROI first; fields tuned on the processor's output alone are read as-is
+    binarize: bool = True
+
+
+def prepare(roi: Frame, field: OcrField) -> Frame:
+    """The image tesseract is given for a field's ROI"""
+    return binarize(roi) if field.binarize else roi
+
+
+def binarize(roi: Frame) -> Frame:
+    """Otsu-threshold to dark text on a white background, which tesseract reads best, whatever the UI's colours"""
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(roi, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    # text covers less of the ROI than its background
+    if binary.mean() < 127:
+        cv2.bitwise_not(binary, dst=binary)
+    return binary
+
+
+def stitch(binaries: list[Frame]) -> tuple[Frame, list[tuple[int, int]]]:
+    """
+    Stack binarised ROIs vertically on a white background with padding between
+    them. Returns the image and each ROI's (top, bottom) rows.
+    """
+    width = max(binary.shape[1] for binary in binaries) + 2 * STITCH_PADDING
+    height = sum(binary.shape[0] for binary in binaries) + STITCH_PADDING * (len(binaries) + 1)
+    image = np.full((height, width), 255, dtype=np.uint8)
+    bands = []
+    top = STITCH_PADDING
+    for binary in binaries:
+        h, w = binary.shape
+        image[top:top + h, STITCH_PADDING:STITCH_PADDING + w] = binary
+        bands.append((top, top + h))
+        top += h + STITCH_PADDING
+    return image, bands
+
+
+def combined_whitelist(fields: list[OcrField]) -> str | None:
+    if any(field.whitelist is None for field in fields):
+        return None
+    return "".join(sorted(set("".join(field.whitelist for field in fields))))
+
+
+class OcrEngine:
+    """
+    Reads OcrFields from frames, caching results by a hash of the binarised ROI so
+    an unchanged screen is only recognised once.
+
+    Uses an in-process tesserocr API kept warm across calls when tesserocr is
+    installed; otherwise falls back to pytesseract, which runs the tesseract
+    binary per (uncached) call.
+    """
+
+    def __init__(self, lang: str = "eng", cache_size: int = 256):
+        self.lang: Final = lang
+        self.cache_size: Final = cache_size
+        self.cache: Final[OrderedDict[tuple, str]] = OrderedDict()
+        self.lock: Final = threading.Lock()
+        self.api = tesserocr.PyTessBaseAPI(lang=lang) if tesserocr is not None else None
+        self.hits = 0
+        self.misses = 0
+        if self.api is None:
+            logger.debug("tesserocr not installed, falling back to pytesseract")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+
+    def read(self, frame: Frame, field: OcrField) -> str:
+        return self.read_all(frame, {"text": field})["text"]
+
+    def read_all(self, frame: Frame, fields: Mapping[str, OcrField]) -> dict[str, str]:
+        """
+        Read several fields of one frame. Fields missing from the cache are stitched
+        into a single image and recognised in one pass, then split back per field.
+        """
+        binaries = {name: prepare(field.processor.prepare_frame(frame), field) for name, field in fields.items()}
+        keys = {name: (fields[name], binary.shape, hashlib.blake2b(binary.tobytes(), digest_size=16).digest())
+                for name, binary in binaries.items()}
+        texts = {}
+        with self.lock:
+            for name, key in keys.items():
+                text = self.cache.get(key)
+                if text is not None:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    texts[name] = text
+            pending = [name for name in fields if name not in texts]
+            self.misses += len(pending)
+            # only binarised ROIs share a background that can be stitched
+            stitched = [name for name in pending if fields[name].binarize]
+            if len(stitched) < 2:
+                stitched = []
+            for name in pending:
+                if name not in stitched:
+                    texts[name] = self.recognize(binaries[name], fields[name])
+            if stitched:
+                texts.update(zip(stitched, self.recognize_stitched([binaries[name] for name in stitched],
+                                                                   [fields[name] for name in stitched])))
+            for name in pending:
+                self.cache[keys[name]] = texts[name]
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return {name: texts[name] for name in fields}
+
+    def recognize(self, binary: Frame, field: OcrField) -> str:
+        """Run tesseract on an image prepared for the field, bypassing the cache"""
+        if self.api is not None:
+            self.api.SetPageSegMode(field.psm)
+            self.api.SetVariable("tessedit_char_whitelist", field.whitelist or "")
+            binary = np.ascontiguousarray(binary)
+            channels = binary.shape[2] if binary.ndim == 3 else 1
+            self.api.SetImageBytes(binary.tobytes(), binary.shape[1], binary.shape[0], channels, binary.strides[0])
+            return self.api.GetUTF8Text().strip()
+
+        config = f"--psm {field.psm}"
+        if field.whitelist:
+            config += f" -c tessedit_char_whitelist={field.whitelist}"
+        return pytesseract.image_to_string(binary, lang=self.lang, config=config).strip()
+
+    def recognize_stitched(self, binaries: list[Frame], fields: list[OcrField]) -> list[str]:
+        """Recognise several binarised ROIs in one tesseract pass, bypassing the cache"""
+        image, bands = stitch(binaries)
+        whitelist = combined_whitelist(fields)
+        # (left, centre row, text) of every recognised word
+        words = []
+        if self.api is not None:
+            self.api.SetPageSegMode(PSM_SINGLE_BLOCK)
+            self.api.SetVariable("tessedit_char_whitelist", whitelist or "")
+            self.api.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], 1, image.strides[0])
+            self.api.Recognize()
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(self.api.GetIterator(), level):
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if text and box is not None:
+                    words.append((box[0], (box[1] + box[3]) / 2, text))
+        else:
+            config = f"--psm {PSM_SINGLE_BLOCK}"
+            if whitelist:
+                config += f" -c tessedit_char_whitelist={whitelist}"
+            data = pytesseract.image_to_data(image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT)
+            for text, left, top, height in zip(data["text"], data["left"], data["top"], data["height"]):
+                if text.strip():
+                    words.append((left, top + height / 2, text.strip()))
+
+        results = [[] for _ in bands]
+        for left, centre, text in sorted(words):
+            for i, (top, bottom) in enumerate(bands):
+                if top - STITCH_PADDING / 2 <= centre < bottom + STITCH_PADDING / 2:
+                    results[i].append(text)
+                    break
+        return [" ".join(texts) for texts in results]
@@ -0,0 +1,131 @@
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING, Final
+
+import cv2
+from loguru import logger
+
+from .corpus import unwrap
+from .frame import Frame, PolygonFrameProcessor, SimpleReferenceFrame
+from .frame_batch import ReferenceFrameBatch
+
+if TYPE_CHECKING:
+    from .frame_grabber import FrameGrabber
+
+WINDOW_NAME: Final = 'Frame Grabber'
+
+
+class SnapshotWriter:
+    """Encodes and writes snapshot JPEGs from a background thread"""
+
+    def __init__(self, directory: str = "frames"):
+        self.directory: Final = os.path.abspath(directory)
+        self.snapshots: Final = queue.SimpleQueue()
+        self.count = 0
+        self.writer_thread: Final = threading.Thread(target=self.run, daemon=True)
+        self.writer_thread.start()
+
+    def save(self, frame: Frame) -> None:
+        """Queue a frame for writing; the frame must not be modified afterwards"""
+        self.snapshots.put(frame)
+
+    def run(self):
+        while True:
+            frame = self.snapshots.get()
+            if frame is None:
+                break
+            filepath = os.path.join(self.directory, f'frame-{self.count}.jpg')
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                cv2.imwrite(filepath, frame)
+                logger.info(f"Saved {filepath}")
+            except Exception as e:
+                logger.error(f"Failed to save snapshot {filepath}: {e}")
+            self.count += 1
+
+    def close(self):
+        self.snapshots.put(None)
+        self.writer_thread.join()
+
+
+class Preview:
+    """
+    Displays the grabber's frames from its own thread at a reduced rate so that
+    window-system stalls never hold up capture. Optionally outlines the ROIs of
+    the references a script is waiting for, labelled with the score each one got
+    on the last frame evaluated.
+
+    Keys: 's' saves the current frame (without overlays), 'q' stops capture.
+    """
+
+    def __init__(self, frame_grabber: 'FrameGrabber', fps: float = 15, snapshot_dir: str = "frames"):
+        self.frame_grabber: Final = frame_grabber
+        self.interval: Final = 1 / fps
+        self.snapshot_writer: Final = SnapshotWriter(snapshot_dir)
+        self.overlays: ReferenceFrameBatch | None = None
+        self.stopped: Final = threading.Event()
+        self.preview_thread: Final = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.preview_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.preview_thread.is_alive() and self.preview_thread is not threading.current_thread():
+            self.preview_thread.join()
+        self.snapshot_writer.close()
+
+    def show(self, batch: ReferenceFrameBatch | None) -> None:
+        """Replace the references drawn over the preview (None for none)"""
+        self.overlays = batch
+
+    def run(self):
+        seq = 0
+        while not self.stopped.wait(self.interval):
+            captured = self.frame_grabber.next_frame(seq, timeout=self.interval)
+            if captured is None:
+                if self.frame_grabber.running.is_set():
+                    break
+                continue
+            seq = captured.seq
+
+            frame = self.draw_overlays(captured.image)
+            cv2.imshow(WINDOW_NAME, frame)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('s'):
+                snapshot = self.frame_grabber.copy(captured)
+                if snapshot is not None:
+                    self.snapshot_writer.save(snapshot)
+            elif key == ord('q'):
+                self.frame_grabber.running.set()
+                break
+        cv2.destroyWindow(WINDOW_NAME)
+
+    def draw_overlays(self, frame: Frame) -> Frame:
+        batch = self.overlays
+        if batch is None or not batch.references:
+            return frame
+        # captured frames are read-only views into the grabber's ring
+        frame = frame.copy()
+        # never evaluate here: reference scratch buffers belong to the script's thread
+        scores = batch.scores
+        for reference in batch.references:
+            name = getattr(reference, "name", type(reference).__name__)
+            reference = unwrap(reference)
+            if not isinstance(reference, SimpleReferenceFrame):
+                continue
+            processor = reference.frame_processor
+            if not hasattr(processor, "x1"):
+                continue
+            score = scores.get(id(reference))
+            matched = score is not None and score < reference.threshold
+            color = (0, 255, 0) if matched else (0, 0, 255)
+            if isinstance(processor, PolygonFrameProcessor):
+                cv2.polylines(frame, [processor.points], True, color, 2)
+            else:
+                cv2.rectangle(frame, (processor.x1, processor.y1), (processor.x2, processor.y2), color, 2)
+            label = f"{name} {score:.1f}" if score is not None else name
+            cv2.putText(frame, label, (processor.x1, max(processor.y1 - 6, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+        return frame
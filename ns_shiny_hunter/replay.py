@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Final
+
+import cv2
+
+from .frame import Frame
+
+
+class ReplayCapture:
+    """
+    Plays a recorded capture in place of a capture device. Frames are released at
+    their recorded timestamps (divided by speed) on the time.monotonic() timeline,
+    so a FrameGrabber reading from it publishes the same seq/timestamp metadata as
+    it would live. A speed of 0 plays as fast as frames can be decoded.
+
+    Implements the parts of cv2.VideoCapture the FrameGrabber uses, passing
+    properties through to the underlying file capture.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path: Final = path
+        self.speed: Final = speed
+        self.loop: Final = loop
+        self.video_capture: Final = cv2.VideoCapture(path)
+        if not self.video_capture.isOpened():
+            raise FileNotFoundError(f"Unable to open recording: {path}")
+        fps = self.video_capture.get(cv2.CAP_PROP_FPS)
+        self.frame_interval_ms: Final = 1000 / fps if fps > 0 else 1000 / 30
+        # serialises reads with seeks from other threads
+        self.lock: Final = threading.Lock()
+        # time.monotonic() at which recording position 0 is due; reset by seek()
+        self.origin: float | None = None
+        # recording time added per completed loop so positions keep increasing
+        self.loop_offset_ms = 0.0
+        # recorded position (ms, including loops) and due time of the last frame read
+        self.position_ms = 0.0
+        self.timestamp: float | None = None
+        self.loops = 0
+        self.finished = False
+
+    def set(self, prop: int, value: float) -> bool:
+        return self.video_capture.set(prop, value)
+
+    def get(self, prop: int) -> float:
+        return self.video_capture.get(prop)
+
+    def isOpened(self) -> bool:
+        return self.video_capture.isOpened()
+
+    def release(self):
+        self.video_capture.release()
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def seek(self, seconds: float | None = None, frame: int | None = None):
+        """Continue playback from a recorded time or frame index; the next frame is due immediately"""
+        with self.lock:
+            if frame is not None:
+                self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame)
+            else:
+                self.video_capture.set(cv2.CAP_PROP_POS_MSEC, (seconds or 0) * 1000)
+            self.origin = None
+            self.finished = False
+
+    def read(self, image: Frame | None = None) -> tuple[bool, Frame | None]:
+        with self.lock:
+            success, frame = self.video_capture.read(image=image)
+            if not success and self.loop and self.video_capture.get(cv2.CAP_PROP_POS_FRAMES) > 0:
+                self.loop_offset_ms = self.position_ms + self.frame_interval_ms
+                self.loops += 1
+                self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                success, frame = self.video_capture.read(image=image)
+            if not success:
+                self.finished = True
+                return False, None
+
+            self.position_ms = self.loop_offset_ms + self.video_capture.get(cv2.CAP_PROP_POS_MSEC)
+            if self.speed <= 0:
+                self.timestamp = time.monotonic()
+                return True, frame
+            if self.origin is None:
+                self.origin = time.monotonic() - self.position_ms / 1000 / self.speed
+            self.timestamp = self.origin + self.position_ms / 1000 / self.speed
+            delay = self.timestamp - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return True, frame
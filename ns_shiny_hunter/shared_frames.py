@@ -0,0 +1,61 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Final
+
+import numpy as np
+from loguru import logger
+
+SEQ_DTYPE: Final = np.dtype(np.int64)
+
+
+class SharedFrameRing:
+    """
+    A ring of BGR frame buffers and the sequence number held by each slot, laid
+    out in a single shared memory block so other processes can read captured
+    frames without copying them.
+
+    Layout: slots x int64 sequence numbers, then slots x (height, width, 3) uint8 frames.
+    """
+
+    def __init__(self, shm: SharedMemory, slots: int, height: int, width: int, readonly: bool = False):
+        self.shm: Final = shm
+        self.slots: Final = slots
+        self.height: Final = height
+        self.width: Final = width
+        self.seqs: Final = np.ndarray((slots,), dtype=SEQ_DTYPE, buffer=shm.buf)
+        offset = slots * SEQ_DTYPE.itemsize
+        frame_bytes = height * width * 3
+        self.frames: Final = [
+            np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf, offset=offset + i * frame_bytes)
+            for i in range(slots)
+        ]
+        if readonly:
+            for frame in self.frames:
+                frame.flags.writeable = False
+
+    @staticmethod
+    def size(slots: int, height: int, width: int) -> int:
+        return slots * SEQ_DTYPE.itemsize + slots * height * width * 3
+
+    @classmethod
+    def create(cls, slots: int, height: int, width: int) -> 'SharedFrameRing':
+        shm = SharedMemory(create=True, size=cls.size(slots, height, width))
+        ring = cls(shm, slots, height, width)
+        ring.seqs[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, slots: int, height: int, width: int) -> 'SharedFrameRing':
+        return cls(SharedMemory(name=name), slots, height, width, readonly=True)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self, unlink: bool = False) -> None:
+        if unlink:
+            self.shm.unlink()
+        try:
+            self.shm.close()
+        except BufferError:
+            # frames are still referenced; the mapping is released once they are collected
+            logger.debug(f"Shared frame ring {self.name} still in use, deferring unmap")
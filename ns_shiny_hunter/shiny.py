@@ -0,0 +1,252 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Final
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from .frame import Frame
+from .frame_grabber import CapturedFrame, FrameGrabber, LazyCapturedFrame
+from .mjpeg import SCALE_FLAGS, turbo_jpeg
+
+
+class ShinyIndicator:
+    """
+    A screen region whose share of pixels in an HSV colour range signals a shiny.
+    Steady indicators (icons) hit when the share reaches min_fraction; relative
+    indicators (sparkle effects) hit when it rises min_fraction above the region's
+    recent baseline and must fade again shortly after, so neither a bright scene
+    nor a lasting change of scene counts as a sparkle. Shares above max_fraction
+    are scene changes (menus, transitions) rather than an indicator.
+
+    Regions are sampled every `stride` pixels to keep the per-frame cost down.
+    """
+
+    def __init__(self,
+                 name: str,
+                 x1: int,
+                 y1: int,
+                 x2: int,
+                 y2: int,
+                 lower: tuple[int, int, int],
+                 upper: tuple[int, int, int],
+                 min_fraction: float,
+                 max_fraction: float = 1.0,
+                 relative: bool = False,
+                 stride: int = 2):
+        self.name: Final = name
+        self.x1: Final = x1
+        self.y1: Final = y1
+        self.x2: Final = x2
+        self.y2: Final = y2
+        self.lower: Final = np.array(lower, dtype=np.uint8)
+        self.upper: Final = np.array(upper, dtype=np.uint8)
+        self.min_fraction: Final = min_fraction
+        self.max_fraction: Final = max_fraction
+        self.relative: Final = relative
+        self.stride: Final = stride
+
+    def sample(self, captured: CapturedFrame | LazyCapturedFrame) -> Frame:
+        if isinstance(captured, LazyCapturedFrame) and self.stride in SCALE_FLAGS and turbo_jpeg() is not None:
+            # decode just the region, scaled down while decoding
+            return captured.decode_roi(self.x1, self.y1, self.x2, self.y2, self.stride)
+        return captured.image[self.y1:self.y2:self.stride, self.x1:self.x2:self.stride]
+
+    def fraction(self, sample: Frame) -> float:
+        """Share of the sampled pixels within the colour range"""
+        mask = cv2.inRange(cv2.cvtColor(sample, cv2.COLOR_BGR2HSV), self.lower, self.upper)
+        return cv2.countNonZero(mask) / mask.size
+
+
+@dataclass(frozen=True)
+class ShinyDetection:
+    indicator: str
+    seq: int
+    timestamp: float
+    # the indicator's share of in-range pixels (above baseline, if relative) on the confirming frame
+    score: float
+
+
+@dataclass
+class Burst:
+    """A run of hits of a relative indicator, from its first hit until the hits have left the window"""
+    frames: int = 0
+    detection: ShinyDetection | None = None
+
+
+class ShinyFound(Exception):
+    """Raised by ShinyDetector.check() to stop a script once a shiny has been detected"""
+
+    def __init__(self, detection: ShinyDetection):
+        super().__init__(f"Shiny detected by {detection.indicator} on frame {detection.seq}")
+        self.detection = detection
+
+
+class ShinyDetector:
+    """
+    Evaluates shiny indicators on every captured frame from its own thread. An
+    indicator must hit on `confirm` of the last `window` frames before a shiny is
+    reported, which filters out single-frame flashes and compression noise.
+
+    A relative indicator's baseline is the median share over its last
+    `baseline_frames` frames, so it follows lasting changes of scene on its own.
+    Its hits are only reported once they have faded, and only if that took at
+    most `max_burst_frames` frames: a sparkle is brief, whereas a brighter scene
+    stays hit until the baseline has caught up with it.
+
+    On detection `found` is set, registered callbacks run (e.g. saving a clip) and
+    scripts polling check() stop with ShinyFound.
+    """
+
+    def __init__(self,
+                 frame_grabber: FrameGrabber,
+                 indicators: Iterable[ShinyIndicator],
+                 confirm: int = 3,
+                 window: int = 5,
+                 baseline_frames: int = 150,
+                 max_burst_frames: int = 45):
+        self.frame_grabber: Final = frame_grabber
+        self.indicators: Final = tuple(indicators)
+        self.confirm: Final = confirm
+        self.window: Final = window
+        self.baseline_frames: Final = baseline_frames
+        self.max_burst_frames: Final = max_burst_frames
+        self.hits: Final = {indicator.name: deque(maxlen=window) for indicator in self.indicators}
+        # recent shares of each relative indicator, whose median is its baseline
+        self.history: Final = {indicator.name: deque(maxlen=baseline_frames)
+                               for indicator in self.indicators if indicator.relative}
+        self.bursts: Final[dict[str, Burst]] = {}
+        self.callbacks: Final[list[Callable[[ShinyDetection], None]]] = []
+        self.found: Final = threading.Event()
+        # detections may be reported from the detector's thread and others at once
+        self.report_lock: Final = threading.Lock()
+        self.detection: ShinyDetection | None = None
+        self.frames = 0
+        self.seconds = 0.0
+        self.stopped: Final = threading.Event()
+        self.detector_thread: Final = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self.detector_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.detector_thread.is_alive() and self.detector_thread is not threading.current_thread():
+            self.detector_thread.join()
+
+    def on_detect(self, callback: Callable[[ShinyDetection], None]) -> None:
+        """Call back (from the detector's thread) when a shiny is detected"""
+        self.callbacks.append(callback)
+
+    def report(self, detection: ShinyDetection) -> None:
+        """
+        Record a detection and notify callbacks, unless one is already pending
+        reset(). Also takes detections from other sources, such as an AudioDetector.
+        """
+        with self.report_lock:
+            if self.found.is_set():
+                return
+            self.detection = detection
+            self.found.set()
+        logger.success(f"Shiny detected by {detection.indicator} on frame {detection.seq} "
+                       f"(score {detection.score:.3f})")
+        for callback in self.callbacks:
+            try:
+                callback(detection)
+            except Exception as e:
+                logger.error(f"Shiny detection callback failed: {e}")
+
+    def check(self) -> None:
+        """Raise ShinyFound if a shiny has been detected"""
+        if self.found.is_set():
+            raise ShinyFound(self.detection)
+
+    def reset(self) -> None:
+        """Forget detections, hit history and baselines, e.g. after a shiny was dealt with"""
+        for hits in self.hits.values():
+            hits.clear()
+        for history in self.history.values():
+            history.clear()
+        self.bursts.clear()
+        self.detection = None
+        self.found.clear()
+
+    @property
+    def frame_time(self) -> float:
+        """Mean seconds spent evaluating the indicators per frame"""
+        return self.seconds / self.frames if self.frames else 0.0
+
+    def update(self, captured: CapturedFrame | LazyCapturedFrame) -> ShinyDetection | None:
+        """Evaluate every indicator on a frame and return a detection once one is confirmed"""
+        start = time.perf_counter()
+        fractions = [indicator.fraction(indicator.sample(captured)) for indicator in self.indicators]
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+        # a frame overwritten mid-evaluation may have produced torn fractions
+        if not self.frame_grabber.is_current(captured):
+            return None
+
+        detection = None
+        for indicator, fraction in zip(self.indicators, fractions):
+            score = fraction
+            if indicator.relative:
+                history = self.history[indicator.name]
+                score = fraction - (float(np.median(history)) if history else fraction)
+                history.append(fraction)
+            hit = indicator.min_fraction <= score and fraction <= indicator.max_fraction
+            hits = self.hits[indicator.name]
+            hits.append(hit)
+            confirmed = None
+            if hit and sum(hits) >= self.confirm:
+                confirmed = ShinyDetection(indicator.name, captured.seq, captured.timestamp, score)
+            if indicator.relative:
+                confirmed = self.track_burst(indicator.name, hits, confirmed)
+            if detection is None:
+                detection = confirmed
+        return detection
+
+    def track_burst(self, name: str, hits: deque[bool], confirmed: ShinyDetection | None) -> ShinyDetection | None:
+        """Follow a relative indicator's hits and return its first confirmation once a brief burst has faded"""
+        burst = self.bursts.get(name)
+        if burst is None:
+            if not hits[-1]:
+                return None
+            burst = self.bursts[name] = Burst()
+        burst.frames += 1
+        if burst.detection is None:
+            burst.detection = confirmed
+        if any(hits):
+            return None
+        del self.bursts[name]
+        if burst.detection is not None and burst.frames > self.max_burst_frames:
+            logger.debug(f"Ignoring {name} hits lasting {burst.frames} frames, too long for a sparkle")
+            return None
+        return burst.detection
+
+    def run(self):
+        seq = self.frame_grabber.seq
+        while not self.stopped.is_set():
+            # the newest frame: when evaluation falls behind capture, skip ahead rather than lag live video
+            captured = self.frame_grabber.next_frame(seq, timeout=FrameGrabber.WAIT_SLICE)
+            if captured is None:
+                if self.frame_grabber.running.is_set():
+                    break
+                continue
+            seq = captured.seq
+            # idle until reset() once a shiny has been reported
+            if self.found.is_set():
+                continue
+            detection = self.update(captured)
+            if detection is not None:
+                self.report(detection)
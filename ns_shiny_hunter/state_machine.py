@@ -0,0 +1,133 @@
+import time
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass
+from typing import Final
+
+from loguru import logger
+
+from .frame import ReferenceFrame
+from .frame_batch import ReferenceFrameBatch
+from .frame_grabber import FrameGrabber, FrameMatch
+from .shiny import ShinyDetector
+from .telemetry import Telemetry
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Leave for `target` once `reference` matches a frame, running `action` on the way"""
+    reference: ReferenceFrame
+    target: Hashable
+    action: Callable[[], None] | None = None
+
+
+@dataclass(frozen=True)
+class StateSpec:
+    """
+    What a state does and which screens end it.
+
+    `enter` runs once when the state is entered. Then, while no transition has
+    matched, `repeat` (typically a button press) runs every `interval` seconds and
+    every frame captured from just before it is judged against the references of
+    all transitions at once. A state without `repeat` just waits for a match.
+    With `judge_current`, the frame already on screen is judged before the first
+    repeat, so a screen that is already showing is not pressed through.
+
+    A state without transitions moves straight on to `then` after `enter`; one
+    with neither ends the run.
+    """
+    transitions: tuple[Transition, ...] = ()
+    enter: Callable[[], None] | None = None
+    repeat: Callable[[], None] | None = None
+    interval: float = 0.1
+    judge_current: bool = True
+    then: Hashable | None = None
+
+
+class StateMachine:
+    """
+    Runs a script declared as a mapping of states to StateSpecs. All candidate
+    references of the current state are evaluated in one ReferenceFrameBatch pass
+    per new frame, and the first match is dispatched as soon as its frame is
+    captured rather than after a fixed delay.
+
+    run() returns when a state has no way out or capture stops, and raises
+    ShinyFound (from the optional ShinyDetector) between inputs. An optional
+    Telemetry records every state visit and the resets reported by count_reset().
+    """
+
+    def __init__(self,
+                 frame_grabber: FrameGrabber,
+                 states: Mapping[Hashable, StateSpec],
+                 initial: Hashable,
+                 shiny_detector: ShinyDetector | None = None,
+                 telemetry: Telemetry | None = None):
+        targets = {transition.target for spec in states.values() for transition in spec.transitions}
+        targets |= {spec.then for spec in states.values() if spec.then is not None}
+        undeclared = (targets | {initial}) - states.keys()
+        if undeclared:
+            raise ValueError(f"Transitions to undeclared states: {sorted(map(str, undeclared))}")
+        self.frame_grabber: Final = frame_grabber
+        self.states: Final = states
+        self.shiny_detector: Final = shiny_detector
+        self.telemetry: Final = telemetry
+        self.batches: Final = {state: ReferenceFrameBatch(transition.reference for transition in spec.transitions)
+                               for state, spec in states.items()}
+        self.state = initial
+
+    def enter(self, state: Hashable) -> None:
+        logger.debug(f"{self.state} -> {state}")
+        self.state = state
+        if self.telemetry is not None:
+            self.telemetry.enter(state)
+        if self.frame_grabber.preview is not None:
+            self.frame_grabber.preview.show(self.batches[state])
+        spec = self.states[state]
+        if spec.enter is not None:
+            spec.enter()
+
+    def count_reset(self) -> None:
+        if self.telemetry is not None:
+            self.telemetry.reset()
+
+    def check_shiny(self) -> None:
+        if self.shiny_detector is not None:
+            self.shiny_detector.check()
+
+    def wait(self, spec: StateSpec, first: bool) -> FrameMatch | None:
+        """One round of waiting for any of the state's references, pressing `repeat` first if there is one"""
+        batch = self.batches[self.state]
+        if first and spec.judge_current:
+            return self.frame_grabber.wait_for_any(batch, timeout=0)
+        if spec.repeat is None:
+            return self.frame_grabber.wait_for_any(batch, after=time.monotonic())
+        after = time.monotonic()
+        spec.repeat()
+        match = self.frame_grabber.wait_for_any(batch, timeout=spec.interval, after=after)
+        if match is None and self.telemetry is not None:
+            self.telemetry.retry()
+        return match
+
+    def run(self) -> None:
+        self.enter(self.state)
+        first = True
+        while True:
+            self.check_shiny()
+            spec = self.states[self.state]
+            if not spec.transitions:
+                if spec.then is None:
+                    return
+                self.enter(spec.then)
+                first = True
+                continue
+
+            match = self.wait(spec, first)
+            first = False
+            if match is None:
+                if self.frame_grabber.running.is_set():
+                    return
+                continue
+            transition = next(t for t in spec.transitions if t.reference is match.reference)
+            if transition.action is not None:
+                transition.action()
+            self.enter(transition.target)
+            first = True
@@ -0,0 +1,277 @@
+import queue
+import struct
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import BinaryIO, Final, NamedTuple
+
+from loguru import logger
+
+MAGIC: Final = b"NSST"
+VERSION: Final = 1
+
+# magic, version
+HEADER: Final = struct.Struct("<4sB")
+# kind, state id, name length (followed by the UTF-8 name); written once per state before its first visit
+NAME: Final = struct.Struct("<BHH")
+# kind, state id, enter_ns, exit_ns, retries, inputs
+VISIT: Final = struct.Struct("<BHqqHI")
+# kind, timestamp_ns
+RESET: Final = struct.Struct("<Bq")
+
+KIND_NAME: Final = 0
+KIND_VISIT: Final = 1
+KIND_RESET: Final = 2
+
+MAX_RETRIES: Final = 0xFFFF
+MAX_INPUTS: Final = 0xFFFFFFFF
+
+
+class StateVisit(NamedTuple):
+    state: str
+    enter_ns: int
+    exit_ns: int
+    # repeat rounds that ended without a transition matching
+    retries: int
+    # controller states sent while in the state
+    inputs: int
+
+    @property
+    def seconds(self) -> float:
+        return (self.exit_ns - self.enter_ns) / 1e9
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 1]) of already sorted values"""
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def resets_per_hour(timestamps_ns: Sequence[int]) -> float:
+    """Reset rate over the span of the given reset timestamps"""
+    if len(timestamps_ns) < 2:
+        return 0.0
+    return (len(timestamps_ns) - 1) * 3600e9 / max(timestamps_ns[-1] - timestamps_ns[0], 1)
+
+
+@dataclass(frozen=True)
+class StateTimings:
+    state: str
+    visits: int
+    seconds: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+    retries: int
+    inputs: int
+
+    @classmethod
+    def from_visits(cls, state: str, visits: Iterable[StateVisit]) -> 'StateTimings':
+        visits = list(visits)
+        durations = sorted(visit.seconds for visit in visits)
+        return cls(state, len(visits), sum(durations),
+                   percentile(durations, 0.5), percentile(durations, 0.9), percentile(durations, 0.99),
+                   durations[-1], sum(visit.retries for visit in visits), sum(visit.inputs for visit in visits))
+
+
+def summarize(visits: Iterable[StateVisit]) -> list[StateTimings]:
+    """Timings per state, the states that take the most time in total first"""
+    by_state = defaultdict(list)
+    for visit in visits:
+        by_state[visit.state].append(visit)
+    timings = [StateTimings.from_visits(state, state_visits) for state, state_visits in by_state.items()]
+    return sorted(timings, key=lambda timing: timing.seconds, reverse=True)
+
+
+def format_report(visits: Iterable[StateVisit], resets_ns: Sequence[int]) -> Iterator[str]:
+    """Lines of a per-state timing table followed by reset statistics"""
+    timings = summarize(visits)
+    resets_ns = list(resets_ns)
+    total = sum(timing.seconds for timing in timings)
+    yield (f"{'state':<40} {'visits':>7} {'share':>6} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} "
+           f"{'retries':>8} {'inputs':>7}")
+    for timing in timings:
+        yield (f"{timing.state:<40} {timing.visits:>7} {timing.seconds / max(total, 1e-9):>6.1%} "
+               f"{timing.p50:>7.2f} {timing.p90:>7.2f} {timing.p99:>7.2f} {timing.max:>7.2f} "
+               f"{timing.retries / timing.visits:>8.1f} {timing.inputs / timing.visits:>7.1f}")
+    if len(resets_ns) >= 2:
+        cycles = sorted((b - a) / 1e9 for a, b in zip(resets_ns, resets_ns[1:]))
+        yield (f"Resets: {len(resets_ns)} at {resets_per_hour(resets_ns):.1f}/hour "
+               f"(cycle p50={percentile(cycles, 0.5):.2f}s p90={percentile(cycles, 0.9):.2f}s "
+               f"max={cycles[-1]:.2f}s)")
+    else:
+        yield f"Resets: {len(resets_ns)}"
+
+
+class Telemetry:
+    """
+    Records how long a StateMachine spends in each state, how many repeat rounds
+    each visit needed and how many controller inputs it sent, plus the time of
+    every completed reset.
+
+    The last `window` visits per state and resets are kept in memory for rolling
+    percentiles and the current reset rate. With a path, every visit and reset is
+    also appended to a compact binary file from a background thread, so the
+    script never blocks on disk I/O; see read_telemetry().
+
+    `inputs` returns a running count of sent inputs, e.g. lambda: client.inputs.
+    """
+
+    def __init__(self,
+                 path: str | None = None,
+                 inputs: Callable[[], int] | None = None,
+                 window: int = 100,
+                 flush_interval: float = 0.5):
+        self.path: Final = path
+        self.inputs: Final = inputs
+        self.window: Final = window
+        self.flush_interval: Final = flush_interval
+        self.visits: Final[dict[str, deque[StateVisit]]] = defaultdict(lambda: deque(maxlen=window))
+        self.resets: Final[deque[int]] = deque(maxlen=window)
+        self.state_ids: Final[dict[str, int]] = {}
+        # the visit in progress: state, enter_ns, retries, input count at entry
+        self.current: tuple[str, int, int, int] | None = None
+        self.records: Final = queue.SimpleQueue()
+        self.fp: BinaryIO | None = None
+        if path is not None:
+            self.fp = open(path, "wb")
+            self.fp.write(HEADER.pack(MAGIC, VERSION))
+        self.stopped: Final = threading.Event()
+        self.writer_thread: Final = threading.Thread(target=self.run, daemon=True)
+        if self.fp is not None:
+            self.writer_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def input_count(self) -> int:
+        return self.inputs() if self.inputs is not None else 0
+
+    def enter(self, state: Hashable) -> None:
+        """End the visit in progress, if any, and start one of `state`"""
+        now_ns = time.monotonic_ns()
+        self.end_visit(now_ns)
+        self.current = (str(state), now_ns, 0, self.input_count())
+
+    def retry(self) -> None:
+        """Count a repeat round of the current state that did not lead anywhere"""
+        if self.current is not None:
+            state, enter_ns, retries, inputs = self.current
+            self.current = (state, enter_ns, retries + 1, inputs)
+
+    def reset(self) -> None:
+        """Mark the completion of a reset"""
+        now_ns = time.monotonic_ns()
+        self.resets.append(now_ns)
+        self.write(RESET.pack(KIND_RESET, now_ns))
+
+    def end_visit(self, exit_ns: int) -> None:
+        if self.current is None:
+            return
+        state, enter_ns, retries, inputs = self.current
+        self.current = None
+        visit = StateVisit(state, enter_ns, exit_ns, retries, self.input_count() - inputs)
+        self.visits[state].append(visit)
+        if self.fp is None:
+            return
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self.state_ids[state] = len(self.state_ids)
+            name = state.encode()
+            self.write(NAME.pack(KIND_NAME, state_id, len(name)) + name)
+        self.write(VISIT.pack(KIND_VISIT, state_id, enter_ns, exit_ns,
+                              min(retries, MAX_RETRIES), min(visit.inputs, MAX_INPUTS)))
+
+    @property
+    def resets_per_hour(self) -> float:
+        """Reset rate over the last `window` resets"""
+        return resets_per_hour(self.resets)
+
+    def report(self) -> Iterator[str]:
+        """format_report() over the rolling window"""
+        return format_report((visit for visits in self.visits.values() for visit in visits), self.resets)
+
+    def write(self, record: bytes) -> None:
+        if self.fp is not None:
+            self.records.put(record)
+
+    def run(self):
+        buf = bytearray()
+        while not self.stopped.is_set() or not self.records.empty():
+            try:
+                buf += self.records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # drain whatever else is pending so a burst costs a single write
+            while True:
+                try:
+                    buf += self.records.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                self.fp.write(buf)
+                self.fp.flush()
+            except Exception as e:
+                logger.error(f"Failed to write telemetry records: {e}")
+            buf.clear()
+
+    def close(self):
+        if self.stopped.is_set():
+            return
+        self.end_visit(time.monotonic_ns())
+        self.stopped.set()
+        if self.fp is not None:
+            self.writer_thread.join()
+            self.fp.close()
+
+
+@dataclass(frozen=True)
+class TelemetryLog:
+    visits: list[StateVisit]
+    resets_ns: list[int]
+
+
+def read_telemetry(path: str) -> TelemetryLog:
+    """Read a file written by Telemetry, ignoring a record cut short by an unclean exit"""
+    with open(path, "rb") as fp:
+        magic, version = HEADER.unpack(fp.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a telemetry file: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported telemetry version {version}: {path}")
+        data = fp.read()
+
+    names: dict[int, str] = {}
+    log = TelemetryLog([], [])
+    offset = 0
+    while offset < len(data):
+        kind = data[offset]
+        if kind == KIND_NAME:
+            if offset + NAME.size > len(data):
+                break
+            _, state_id, length = NAME.unpack_from(data, offset)
+            offset += NAME.size
+            if offset + length > len(data):
+                break
+            names[state_id] = data[offset:offset + length].decode()
+            offset += length
+        elif kind == KIND_VISIT:
+            if offset + VISIT.size > len(data):
+                break
+            _, state_id, enter_ns, exit_ns, retries, inputs = VISIT.unpack_from(data, offset)
+            offset += VISIT.size
+            log.visits.append(StateVisit(names[state_id], enter_ns, exit_ns, retries, inputs))
+        elif kind == KIND_RESET:
+            if offset + RESET.size > len(data):
+                break
+            _, timestamp_ns = RESET.unpack_from(data, offset)
+            offset += RESET.size
+            log.resets_ns.append(timestamp_ns)
+        else:
+            raise ValueError(f"Unknown telemetry record kind {kind} at byte {HEADER.size + offset}: {path}")
+    return log
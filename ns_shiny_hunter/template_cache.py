@@ -0,0 +1,64 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+from collections.abc import Callable, Hashable
+from typing import Final
+
+import cv2
+import numpy as np
+from loguru import logger
+
+CACHE_DIR_ENV: Final = "NS_SHINY_HUNTER_CACHE_DIR"
+
+
+def cache_dir() -> pathlib.Path | None:
+    """Directory holding precompiled templates, or None when caching is disabled (env set to empty)"""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured is not None:
+        return pathlib.Path(configured) if configured else None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return pathlib.Path(base) / "ns_shiny_hunter" / "templates"
+
+
+def template_key(image: bytes, processor_key: Hashable) -> str:
+    digest = hashlib.sha256(image)
+    digest.update(repr(processor_key).encode())
+    # processing output may change between OpenCV releases
+    digest.update(cv2.__version__.encode())
+    return digest.hexdigest()
+
+
+def load_template(source: pathlib.Path,
+                  processor_key: Hashable | None,
+                  prepare: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Load the processed template for a reference image, decoding and preparing the
+    image only when no cached copy exists for this image content and processor.
+    """
+    image = source.read_bytes()
+    directory = cache_dir()
+    cached = None
+    if directory is not None and processor_key is not None:
+        cached = directory / f"{template_key(image, processor_key)}.npy"
+        if cached.exists():
+            try:
+                return np.load(cached)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable template cache {cached}: {e}")
+
+    frame = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise FileNotFoundError(f"Unable to read reference frame: {source}")
+    template = np.ascontiguousarray(prepare(frame)).copy()
+
+    if cached is not None:
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npy.tmp")
+            with os.fdopen(fd, "wb") as fp:
+                np.save(fp, template)
+            os.replace(tmp, cached)
+        except OSError as e:
+            logger.warning(f"Unable to write template cache {cached}: {e}")
+    return template
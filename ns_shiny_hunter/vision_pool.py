@@ -0,0 +1,137 @@
+import functools
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Final
+
+import pytesseract
+
+from .frame import PREPARED_FRAME_CACHE, Frame, FrameProcessor, ReferenceFrame
+from .frame_batch import ReferenceFrameBatch
+from .frame_grabber import CapturedFrame, FrameGrabber
+from .shared_frames import SharedFrameRing
+
+
+class StaleFrameError(RuntimeError):
+    """The frame's ring slot was overwritten by capture before or while the job ran"""
+
+
+# worker process state, set up by _attach
+_shared_ring: SharedFrameRing | None = None
+
+
+def _attach(name: str, slots: int, height: int, width: int) -> None:
+    global _shared_ring
+    _shared_ring = SharedFrameRing.attach(name, slots, height, width)
+
+
+def _run(fn: Callable[..., Any], seq: int, image: Frame | None, args: tuple) -> Any:
+    # prepared ROIs are cached by frame identity, and a ring slot is the same array for every frame it holds
+    PREPARED_FRAME_CACHE.clear()
+    if image is not None:
+        return fn(image, *args)
+    slot = seq % _shared_ring.slots
+    if _shared_ring.seqs[slot] != seq:
+        raise StaleFrameError(f"Frame {seq} was overwritten before it was processed")
+    result = fn(_shared_ring.frames[slot], *args)
+    if _shared_ring.seqs[slot] != seq:
+        raise StaleFrameError(f"Frame {seq} was overwritten while it was processed")
+    return result
+
+
+@functools.lru_cache(maxsize=32)
+def _batch(references: tuple[ReferenceFrame, ...]) -> ReferenceFrameBatch:
+    return ReferenceFrameBatch(references)
+
+
+def first_match_index(frame: Frame, references: tuple[ReferenceFrame, ...]) -> int | None:
+    match = _batch(references).first_match(frame)
+    return None if match is None else references.index(match)
+
+
+def percent_matches(frame: Frame, references: tuple[ReferenceFrame, ...]) -> list[float]:
+    scores = _batch(references).get_percent_matches(frame)
+    return [scores[reference] for reference in references]
+
+
+def image_to_string(frame: Frame, processor: FrameProcessor, config: str = "") -> str:
+    return pytesseract.image_to_string(processor.prepare_frame(frame), config=config)
+
+
+class VisionPool:
+    """
+    Runs vision jobs in worker processes against frames captured by a FrameGrabber
+    created with shared_memory=True. Workers read frames straight out of the
+    grabber's shared ring, so submitting a job copies no pixels; results come back
+    as futures, which fail with StaleFrameError if capture overwrote the frame
+    before the job finished.
+
+    References are pickled per job, so prefer ReferenceFrameEnum members (pickled
+    by name); each worker loads and caches its own templates.
+    """
+
+    def __init__(self, frame_grabber: FrameGrabber, workers: int | None = None):
+        shared_ring = frame_grabber.shared_ring
+        if shared_ring is None:
+            raise ValueError("VisionPool requires a FrameGrabber created with shared_memory=True")
+        self.frame_grabber: Final = frame_grabber
+        self.executor: Final = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach,
+            initargs=(shared_ring.name, shared_ring.slots, shared_ring.height, shared_ring.width),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, captured: CapturedFrame | None = None) -> Future:
+        """
+        Run fn(frame, *args) in a worker against the captured frame (the newest one
+        by default). fn and args must be picklable.
+        """
+        if captured is None:
+            captured = self.frame_grabber.next_frame(0)
+            if captured is None:
+                raise RuntimeError("Frame capture has stopped")
+        shared_ring = self.frame_grabber.shared_ring
+        slot_frame = shared_ring.frames[captured.seq % shared_ring.slots]
+        # frames the device delivered at an unexpected size do not live in the shared ring
+        image = None if captured.image.base is slot_frame else captured.image
+        return self.executor.submit(_run, fn, captured.seq, image, args)
+
+    def first_match(self,
+                    references: Sequence[ReferenceFrame],
+                    captured: CapturedFrame | None = None) -> 'Future[ReferenceFrame | None]':
+        references = tuple(references)
+        future = self.submit(first_match_index, references, captured=captured)
+        return _map_future(future, lambda index: None if index is None else references[index])
+
+    def percent_matches(self,
+                        references: Sequence[ReferenceFrame],
+                        captured: CapturedFrame | None = None) -> 'Future[list[float]]':
+        return self.submit(percent_matches, tuple(references), captured=captured)
+
+    def image_to_string(self,
+                        processor: FrameProcessor,
+                        config: str = "",
+                        captured: CapturedFrame | None = None) -> 'Future[str]':
+        return self.submit(image_to_string, processor, config, captured=captured)
+
+
+def _map_future(future: Future, fn: Callable[[Any], Any]) -> Future:
+    mapped = Future()
+
+    def done(f: Future):
+        try:
+            mapped.set_result(fn(f.result()))
+        except BaseException as e:
+            mapped.set_exception(e)
+
+    future.add_done_callback(done)
+    return mapped
@@ -0,0 +1,62 @@
+import pathlib
+import statistics
+import time
+
+import click
+import pytesseract
+
+from ns_shiny_hunter.glyphs import GlyphClassifier, read_labelled_text
+from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames import SELL_TEXT_FIELDS, SELL_TEXT_LABELS
+from ns_shiny_hunter.ocr import OcrEngine, prepare
+
+
+def timed(fn) -> tuple[str, float]:
+    start = time.perf_counter()
+    text = fn()
+    return text, (time.perf_counter() - start) * 1e3
+
+
+@click.command()
+@click.option("--labels", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+              default=SELL_TEXT_LABELS, help="Labelled captures, as {field: {capture: text}}")
+@click.option("--model", type=click.Path(exists=True, dir_okay=False), default="glyphs.npz",
+              help="Templates written by train-glyphs.py")
+@click.option("--tesseract/--no-tesseract", default=True, help="Also run pytesseract on the same ROIs")
+def main(labels: pathlib.Path, model: str, tesseract: bool) -> None:
+    """
+    Compare glyph-template reading with pytesseract on labelled captures (same
+    layout as train-glyphs.py; use captures that were not trained on)
+    """
+    classifier = GlyphClassifier.load(model)
+    engine = OcrEngine() if tesseract else None
+
+    results = {"glyphs": ([], []), "tesseract": ([], [])}
+    for name, captures in read_labelled_text(labels).items():
+        field = SELL_TEXT_FIELDS[name]
+        for frame, expected in captures:
+            roi = field.processor.prepare_frame(frame)
+            text, ms = timed(lambda: classifier.read(roi))
+            results["glyphs"][0].append(text == expected)
+            results["glyphs"][1].append(ms)
+            line = f"{name:<18} {expected!r:<24} glyphs {text!r:<24} {ms:7.2f}ms"
+            if engine is not None:
+                try:
+                    # uncached, so every read pays the full recognition cost
+                    text, ms = timed(lambda: engine.recognize(prepare(roi, field), field))
+                except pytesseract.TesseractNotFoundError:
+                    click.echo("tesseract is not installed, skipping it")
+                    engine = None
+                else:
+                    results["tesseract"][0].append(text == expected)
+                    results["tesseract"][1].append(ms)
+                    line += f"  tesseract {text!r:<24} {ms:7.2f}ms"
+            click.echo(line)
+
+    for name, (correct, timings) in results.items():
+        if timings:
+            click.echo(f"{name}: {sum(correct)}/{len(correct)} correct, median {statistics.median(timings):.2f}ms, "
+                       f"max {max(timings):.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
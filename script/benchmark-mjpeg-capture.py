@@ -0,0 +1,67 @@
+import statistics
+import time
+
+import click
+import cv2
+
+from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
+from ns_shiny_hunter.mjpeg import decode, decode_roi, turbo_jpeg
+
+
+def cpu_per_frame(video: str, raw: bool, decode_every: int) -> tuple[float, int]:
+    """Process CPU seconds per frame spent reading a whole recording"""
+    capture = cv2.VideoCapture(video)
+    if raw:
+        capture.set(cv2.CAP_PROP_FORMAT, -1)
+    frames = 0
+    start = time.process_time()
+    while True:
+        success, packet = capture.read()
+        if not success:
+            break
+        if raw and frames % decode_every == 0:
+            decode(packet.tobytes())
+        frames += 1
+    elapsed = time.process_time() - start
+    capture.release()
+    return elapsed / max(frames, 1), frames
+
+
+def median_ms(fn, number: int) -> float:
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+@click.command()
+@click.argument("video", type=click.Path(exists=True, dir_okay=False))
+@click.option("--fps", type=float, default=60, help="Capture rate the recording stands in for")
+@click.option("--consumer-fps", type=float, default=5, help="Rate at which scripts look at frames")
+@click.option("-n", "--number", type=int, default=50, help="Decodes per timing")
+def main(video: str, fps: float, consumer_fps: float, number: int) -> None:
+    """Compare eager decoding of a recorded MJPEG stream with keeping JPEG bytes and decoding on demand"""
+    decode_every = max(round(fps / consumer_fps), 1)
+    eager, frames = cpu_per_frame(video, raw=False, decode_every=1)
+    lazy, _ = cpu_per_frame(video, raw=True, decode_every=decode_every)
+    click.echo(f"{frames} frames, consumer decodes 1 in {decode_every}")
+    click.echo(f"eager decode: {eager * 1e3:7.3f} ms CPU/frame ({eager * fps:.0%} of a core at {fps:g} fps)")
+    click.echo(f"lazy decode:  {lazy * 1e3:7.3f} ms CPU/frame ({lazy * fps:.0%} of a core at {fps:g} fps)")
+
+    capture = cv2.VideoCapture(video)
+    capture.set(cv2.CAP_PROP_FORMAT, -1)
+    _, packet = capture.read()
+    capture.release()
+    jpeg = packet.tobytes()
+    for scale in (1, 2, 4, 8):
+        click.echo(f"decode 1/{scale}: {median_ms(lambda: decode(jpeg, scale), number):7.3f} ms")
+    processor = LegendsZAReferenceFrames.OVERWORLD.value.frame_processor
+    roi = (processor.x1, processor.y1, processor.x2, processor.y2)
+    backend = "libturbojpeg crop" if turbo_jpeg() is not None else "full decode + crop"
+    click.echo(f"decode ROI {roi} ({backend}): {median_ms(lambda: decode_roi(jpeg, *roi), number):7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
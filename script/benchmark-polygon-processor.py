@@ -0,0 +1,47 @@
+import pathlib
+import timeit
+
+import click
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.frame import Frame, PolygonFrameProcessor
+from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
+
+FRAMES_DIR = pathlib.Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za" / "frames"
+
+
+def prepare_frame_full_mask(processor: PolygonFrameProcessor, frame: Frame) -> Frame:
+    """The previous implementation: full-frame mask and bitwise_and, then crop"""
+    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [processor.points], 255)
+    frame = cv2.bitwise_and(frame, frame, mask=mask)
+    frame = frame[processor.y1:processor.y2, processor.x1:processor.x2]
+    return cv2.GaussianBlur(frame, processor.ksize, processor.sigma_x)
+
+
+@click.command()
+@click.option("-n", "--number", type=int, default=2000, help="Calls per timing run")
+@click.option("-r", "--repeat", type=int, default=5, help="Timing runs (best is reported)")
+def main(number: int, repeat: int) -> None:
+    processor = LegendsZAReferenceFrames.OVERWORLD.value.frame_processor
+    frames = [cv2.imread(str(path)) for path in sorted(FRAMES_DIR.glob("*.jpg"))]
+
+    for frame in frames:
+        # the uncached path is what gets run once per new frame
+        if not np.array_equal(prepare_frame_full_mask(processor, frame), processor._prepare_frame(frame)):
+            raise click.ClickException("Cropped mask output differs from full-frame mask output")
+
+    def run(fn) -> float:
+        best = min(timeit.repeat(lambda: [fn(frame) for frame in frames], number=number, repeat=repeat))
+        return best / (number * len(frames)) * 1e6
+
+    before = run(lambda frame: prepare_frame_full_mask(processor, frame))
+    after = run(processor._prepare_frame)
+    click.echo(f"ROI {processor.x2 - processor.x1}x{processor.y2 - processor.y1} over {len(frames)} frames")
+    click.echo(f"full-frame mask: {before:8.2f} us/call")
+    click.echo(f"cropped mask:    {after:8.2f} us/call ({before / after:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+import click
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.corpus import frame_paths, load_frames, load_references
+from ns_shiny_hunter.frame import PREPARED_FRAME_CACHE, Frame, SimpleReferenceFrame
+
+
+def legacy_percent_match(reference: SimpleReferenceFrame, frame: Frame) -> float:
+    """The previous, allocating implementation of get_percent_match"""
+    frame = reference.frame_processor._prepare_frame(frame)
+    res = cv2.absdiff(reference.frame, frame)
+    res = res.astype(np.uint8)
+    return (np.count_nonzero(res) * 100) / res.size
+
+
+def allocated(fn, frames: list[Frame]) -> int:
+    """Peak bytes traced while matching every frame once, after a warm-up pass"""
+    for frame in frames:
+        fn(frame)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for frame in frames:
+        PREPARED_FRAME_CACHE.clear()
+        fn(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - before
+
+
+@click.command()
+@click.option("-n", "--number", type=int, default=200, help="Matches per reference and frame")
+def main(number: int) -> None:
+    # measure the matching itself, not the unchanged-ROI shortcut
+    SimpleReferenceFrame.change_detection = False
+    references = load_references()
+    frames = list(load_frames(frame_paths()).values())
+
+    def run(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            for frame in frames:
+                PREPARED_FRAME_CACHE.clear()
+                fn(frame)
+        return (time.perf_counter() - start) / (number * len(frames)) * 1e6
+
+    click.echo(f"{len(references)} references x {len(frames)} frames, {number} rounds")
+    click.echo(f"{'reference':<70} {'legacy us':>10} {'compiled us':>12} {'speedup':>8} "
+               f"{'legacy B':>10} {'compiled B':>12}")
+    total_legacy = total_compiled = 0.0
+    for name, reference in references.items():
+        for frame in frames:
+            PREPARED_FRAME_CACHE.clear()
+            if legacy_percent_match(reference, frame) != reference.get_percent_match(frame):
+                raise click.ClickException(f"{name}: compiled score differs from legacy score")
+
+        legacy = run(lambda frame, r=reference: legacy_percent_match(r, frame))
+        compiled = run(reference.get_percent_match)
+
+        legacy_alloc = allocated(lambda frame, r=reference: legacy_percent_match(r, frame), frames)
+        compiled_alloc = allocated(reference.get_percent_match, frames)
+
+        total_legacy += legacy
+        total_compiled += compiled
+        click.echo(f"{name:<70} {legacy:10.1f} {compiled:12.1f} {legacy / compiled:7.2f}x "
+                   f"{legacy_alloc:10d} {compiled_alloc:12d}")
+    click.echo(f"{'total':<70} {total_legacy:10.1f} {total_compiled:12.1f} {total_legacy / total_compiled:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
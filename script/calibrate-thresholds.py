@@ -0,0 +1,52 @@
+import json
+import pathlib
+
+import click
+
+from ns_shiny_hunter.calibration import calibrate_directory, find_regressions
+from ns_shiny_hunter.legends_za.shiny import LEGENDS_ZA_SHINY_INDICATORS
+
+
+@click.command()
+@click.argument("labelled_dir", type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path))
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default=None,
+              help="Write the calibration report as JSON")
+@click.option("--check", "baseline", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Previous report; exit non-zero if any reference's margin shrank")
+@click.option("--tolerance", type=float, default=0.0, help="Allowed margin shrinkage for --check")
+def main(labelled_dir: pathlib.Path, output: str | None, baseline: str | None, tolerance: float) -> None:
+    """
+    Propose thresholds from labelled captures laid out as
+    LABELLED_DIR/<Enum>.<MEMBER>/{positive,negative}/*.jpg, and shiny indicators'
+    min_fraction from LABELLED_DIR/shiny.<name>/{positive,negative,baseline}/*.jpg
+    (baseline: the same scenes without the indicator, for relative indicators)
+    """
+    calibrations = calibrate_directory(labelled_dir, LEGENDS_ZA_SHINY_INDICATORS)
+
+    click.echo(f"{'reference':<60} {'current':>8} {'proposed':>9} {'margin':>8} {'pos max':>8} {'neg min':>8}")
+    for calibration in calibrations:
+        def fmt(value: float | None) -> str:
+            return f"{value:8.4f}" if value is not None else f"{'-':>8}"
+
+        click.echo(f"{calibration.name:<60} {calibration.threshold:8} {fmt(calibration.proposed_threshold):>9} "
+                   f"{fmt(calibration.margin)} "
+                   f"{fmt(calibration.positives.max if calibration.positives else None)} "
+                   f"{fmt(calibration.negatives.min if calibration.negatives else None)}")
+        if calibration.margin is not None and calibration.margin <= 0:
+            click.echo(f"  ! positives and negatives overlap for {calibration.name}")
+
+    report = {calibration.name: calibration.to_dict() for calibration in calibrations}
+    if output is not None:
+        pathlib.Path(output).write_text(json.dumps(report, indent=2))
+        click.echo(f"Wrote {output}")
+
+    if baseline is not None:
+        regressions = find_regressions(calibrations, json.loads(pathlib.Path(baseline).read_text()), tolerance)
+        for name in regressions:
+            click.echo(f"Margin regression: {name}", err=True)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
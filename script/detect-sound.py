@@ -0,0 +1,42 @@
+import time
+
+import click
+
+from ns_shiny_hunter.audio import AlsaSource, AudioDetector, WavSource
+
+
+@click.command()
+@click.argument("reference", type=click.Path(exists=True, dir_okay=False))
+@click.option("--wav", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Recorded audio to scan instead of an ALSA device")
+@click.option("--device", default="default", help="ALSA capture device")
+@click.option("--rate", default=48000, type=int, help="ALSA sample rate (must match the reference clip)")
+@click.option("--block-size", default=1024, type=int, help="Samples per analysed block")
+@click.option("--threshold", default=0.6, type=float, help="Minimum correlation with the reference clip")
+@click.option("--realtime", is_flag=True, help="Play the WAV at its real rate rather than as fast as possible")
+def main(reference: str, wav: str | None, device: str, rate: int, block_size: int, threshold: float,
+         realtime: bool) -> None:
+    """Report every occurrence of a reference sound in a WAV file or a live ALSA stream"""
+    if wav is not None:
+        source = WavSource(wav, block_size, realtime=realtime)
+    else:
+        try:
+            source = AlsaSource(device, rate, block_size=block_size)
+        except RuntimeError as e:
+            raise click.UsageError(str(e)) from e
+    detector = AudioDetector(source, reference, threshold=threshold)
+    detector.on_detect(lambda detection: click.echo(f"{detection.offset:8.3f}s  score {detection.score:.2f}"))
+    start = time.process_time()
+    try:
+        with detector:
+            detector.listener_thread.join()
+    except KeyboardInterrupt:
+        pass
+    audio_seconds = detector.blocks * block_size / source.rate
+    cpu = time.process_time() - start
+    click.echo(f"{len(detector.events)} matches in {audio_seconds:.1f}s of audio "
+               f"({cpu / max(audio_seconds, 1e-9):.1%} of a core)")
+
+
+if __name__ == '__main__':
+    main()
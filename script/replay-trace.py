@@ -0,0 +1,44 @@
+import click
+
+from ns_controller.client import NsControllerClient
+from ns_controller.server import DEFAULT_HOST, DEFAULT_PORT
+from ns_controller.trace import read_trace, replay, replay_stream
+
+
+@click.command()
+@click.argument("trace_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--host", default=DEFAULT_HOST, help="Server host")
+@click.option("--port", default=DEFAULT_PORT, type=int, help="Server port")
+@click.option("--speed", default=1.0, type=float, help="Playback speed multiplier")
+@click.option("--stream", is_flag=True, help="Replay over a single StreamState RPC instead of per-state SetState")
+@click.option("--summary", is_flag=True, help="Print latency statistics instead of replaying")
+def main(trace_path: str, host: str, port: int, speed: float, stream: bool, summary: bool) -> None:
+    records = list(read_trace(trace_path))
+    if not records:
+        click.echo("Trace is empty.")
+        return
+
+    if summary:
+        latencies = sorted(record.latency_ns / 1e6 for record in records)
+        duration = (records[-1].timestamp_ns - records[0].timestamp_ns) / 1e9
+        click.echo(f"States: {len(records)} over {duration:.2f}s")
+        click.echo(f"RPC latency (ms): "
+                   f"p50={latencies[len(latencies) // 2]:.2f} "
+                   f"p95={latencies[int(len(latencies) * 0.95)]:.2f} "
+                   f"max={latencies[-1]:.2f}")
+        return
+
+    client = NsControllerClient(host, port)
+    try:
+        if stream:
+            replay_stream(records, client.stub, speed)
+        else:
+            replay(records, client, speed)
+        click.echo(f"Replayed {len(records)} states.")
+    finally:
+        client.clear(post_delay=None)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
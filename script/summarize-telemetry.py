@@ -0,0 +1,27 @@
+import click
+
+from ns_shiny_hunter.telemetry import format_report, read_telemetry
+
+
+@click.command()
+@click.argument("telemetry_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--last", default=0, type=int, help="Only summarise the last N reset cycles (0 for the whole run)")
+def main(telemetry_path: str, last: int) -> None:
+    """Per-state timing percentiles (seconds) and the reset rate of a recorded run"""
+    log = read_telemetry(telemetry_path)
+    visits, resets_ns = log.visits, log.resets_ns
+    if last > 0 and len(resets_ns) > last:
+        resets_ns = resets_ns[-last - 1:]
+        visits = [visit for visit in visits if visit.enter_ns >= resets_ns[0]]
+    if not visits:
+        click.echo("Telemetry is empty.")
+        return
+
+    duration = (visits[-1].exit_ns - visits[0].enter_ns) / 1e9
+    click.echo(f"Visits: {len(visits)} over {duration:.1f}s")
+    for line in format_report(visits, resets_ns):
+        click.echo(line)
+
+
+if __name__ == '__main__':
+    main()
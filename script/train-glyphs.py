@@ -0,0 +1,28 @@
+import pathlib
+
+import click
+
+from ns_shiny_hunter.glyphs import GlyphClassifier, read_labelled_text
+from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames import SELL_TEXT_FIELDS, SELL_TEXT_LABELS
+
+
+@click.command()
+@click.option("--labels", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+              default=SELL_TEXT_LABELS, help="Labelled captures, as {field: {capture: text}}")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default="glyphs.npz",
+              help="Where to write the trained templates")
+def main(labels: pathlib.Path, output: str) -> None:
+    """Train glyph templates for the sell screen's text fields from labelled captures"""
+    samples = []
+    for name, captures in read_labelled_text(labels).items():
+        field = SELL_TEXT_FIELDS[name]
+        samples.extend((field.processor.prepare_frame(frame), text) for frame, text in captures)
+        click.echo(f"{name}: {len(captures)} captures")
+
+    classifier = GlyphClassifier.train(samples)
+    classifier.save(output)
+    click.echo(f"Wrote {output}: {len(classifier.labels)} templates for {len(set(classifier.labels))} characters")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import json
+import pathlib
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+import click
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.corpus import ROOT, frame_paths, load_frames, load_references, variants
+from ns_shiny_hunter.frame import PREPARED_FRAME_CACHE, Frame, SimpleReferenceFrame
+
+
+def time_us(fn, frames: list[Frame], number: int) -> float:
+    """Median per-call time in microseconds, with the prepared-frame cache cold for every call"""
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        for frame in frames:
+            PREPARED_FRAME_CACHE.clear()
+            fn(frame)
+        samples.append((time.perf_counter() - start) / len(frames) * 1e6)
+    return statistics.median(samples)
+
+
+def benchmark_reference(reference: SimpleReferenceFrame,
+                        frames: dict[pathlib.Path, Frame],
+                        number: int) -> dict:
+    captures = list(frames.values())
+    result = {
+        "processor": type(reference.frame_processor).__name__,
+        "threshold": reference.threshold,
+        "source": str(reference.source.resolve().relative_to(ROOT)) if reference.source else None,
+        "prepare_us": time_us(reference.frame_processor.prepare_frame, captures, number),
+        "match_us": time_us(reference.matches, captures, number),
+    }
+
+    # every capture byte-identical to the source counts as the reference's own screen
+    own = [path for path, frame in frames.items()
+           if reference.source is not None and np.array_equal(frame, frames.get(reference.source.resolve()))]
+    cross_matches = []
+    for path, frame in frames.items():
+        PREPARED_FRAME_CACHE.clear()
+        if path not in own and reference.matches(frame):
+            cross_matches.append(str(path.relative_to(ROOT)))
+    result["cross_matches"] = cross_matches
+
+    if own:
+        source_frame = frames[own[0]]
+        PREPARED_FRAME_CACHE.clear()
+        result["self_score"] = reference.get_percent_match(source_frame)
+        result["variants"] = {}
+        for name, frame in variants(source_frame):
+            PREPARED_FRAME_CACHE.clear()
+            score = reference.get_percent_match(frame)
+            result["variants"][name] = {"score": score, "matches": score < reference.threshold}
+    return result
+
+
+def summarize(references: dict[str, dict]) -> dict:
+    processors: dict[str, dict[str, list[float]]] = {}
+    for result in references.values():
+        timings = processors.setdefault(result["processor"], {"prepare_us": [], "match_us": []})
+        timings["prepare_us"].append(result["prepare_us"])
+        timings["match_us"].append(result["match_us"])
+    return {
+        "processors": {
+            name: {
+                "count": len(timings["match_us"]),
+                "prepare_us": statistics.mean(timings["prepare_us"]),
+                "match_us": statistics.mean(timings["match_us"]),
+            }
+            for name, timings in processors.items()
+        },
+        "match_us_total": sum(result["match_us"] for result in references.values()),
+        "cross_matches": sum(len(result["cross_matches"]) for result in references.values()),
+        "variant_misses": sum(
+            not variant["matches"]
+            for result in references.values()
+            for variant in result.get("variants", {}).values()
+        ),
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    click.echo(f"\n{'reference':<70} {'match us':>10} {'baseline':>10} {'change':>8}")
+    for name, result in report["references"].items():
+        previous = baseline["references"].get(name)
+        if previous is None:
+            continue
+        change = (result["match_us"] - previous["match_us"]) / previous["match_us"] * 100
+        click.echo(f"{name:<70} {result['match_us']:10.1f} {previous['match_us']:10.1f} {change:+7.1f}%")
+        gained = set(result["cross_matches"]) - set(previous["cross_matches"])
+        for path in sorted(gained):
+            click.echo(f"  new cross match: {path}")
+    for key in ("match_us_total", "cross_matches", "variant_misses"):
+        click.echo(f"{key}: {report['summary'][key]} (baseline {baseline['summary'][key]})")
+
+
+@click.command()
+@click.option("-n", "--number", type=int, default=20, help="Timing rounds per reference")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default="vision-benchmark.json",
+              help="Where to write the JSON report")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Previous report to compare against")
+def main(number: int, output: str, baseline: str | None) -> None:
+    # measure the matching itself, not the unchanged-ROI shortcut
+    SimpleReferenceFrame.change_detection = False
+    references = load_references()
+    frames = load_frames(frame_paths())
+    click.echo(f"Benchmarking {len(references)} references over {len(frames)} captures...")
+
+    results = {}
+    for name, reference in references.items():
+        results[name] = benchmark_reference(reference, frames, number)
+        result = results[name]
+        click.echo(f"{name:<70} prepare {result['prepare_us']:8.1f}us  match {result['match_us']:8.1f}us  "
+                   f"cross {len(result['cross_matches'])}")
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "number": number,
+            "captures": len(frames),
+        },
+        "references": results,
+        "summary": summarize(results),
+    }
+    pathlib.Path(output).write_text(json.dumps(report, indent=2))
+    click.echo(f"Wrote {output}: {report['summary']['cross_matches']} cross matches, "
+               f"{report['summary']['variant_misses']} variant misses")
+
+    if baseline is not None:
+        compare(report, json.loads(pathlib.Path(baseline).read_text()))
+
+
+if __name__ == '__main__':
+    main()
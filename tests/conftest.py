@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+WIDTH: int = 320
+HEIGHT: int = 180
+FPS: float = 30
+# brightness of every frame of the generated clip: a dark screen, then a bright one
+BRIGHTNESS: tuple[int, ...] = (40,) * 10 + (200,) * 10
+
+
+def solid_frame(brightness: int) -> np.ndarray:
+    return np.full((HEIGHT, WIDTH, 3), brightness, dtype=np.uint8)
+
+
+@pytest.fixture
+def clip_path(tmp_path: Path) -> str:
+    """A short MJPG AVI whose screen turns from dark to bright halfway through"""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter.fourcc(*'MJPG'), FPS, (WIDTH, HEIGHT))
+    assert writer.isOpened()
+    for brightness in BRIGHTNESS:
+        writer.write(solid_frame(brightness))
+    writer.release()
+    return path
+
+
+def read_clip(path: str) -> list[np.ndarray]:
+    """Every frame of a recording, decoded as the capture side decodes it"""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        success, frame = capture.read()
+        if not success:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
@@ -0,0 +1,81 @@
+import wave
+
+import numpy as np
+import pytest
+
+from ns_shiny_hunter import audio
+from ns_shiny_hunter.audio import AlsaSource, AudioDetector, WavSource
+from ns_shiny_hunter.shiny import ShinyDetection, ShinyDetector, ShinyFound
+
+RATE = 48000
+
+
+def chime() -> np.ndarray:
+    """A decaying two-tone chime, 0.3 s long"""
+    t = np.arange(int(0.3 * RATE)) / RATE
+    return (np.sin(2 * np.pi * 2637 * t) + np.sin(2 * np.pi * 3951 * t)) * np.exp(-8 * t) * 0.4
+
+
+def write_wav(path, samples: np.ndarray) -> str:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+    return str(path)
+
+
+def recording(seconds: float, onsets: list[float]) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 0.02, int(seconds * RATE))
+    sound = chime()
+    for onset in onsets:
+        start = int(onset * RATE)
+        samples[start:start + len(sound)] += sound
+    return samples
+
+
+def detect(tmp_path, seconds: float, onsets: list[float]) -> list[float]:
+    reference = write_wav(tmp_path / "reference.wav", chime())
+    stream = write_wav(tmp_path / "stream.wav", recording(seconds, onsets))
+    detector = AudioDetector(WavSource(stream), reference)
+    detector.run()
+    return [detection.offset for detection in detector.events]
+
+
+def test_chimes_are_found_at_their_onsets(tmp_path):
+    offsets = detect(tmp_path, 9.0, [2.0, 6.3])
+    assert np.allclose(offsets, [2.0, 6.3], atol=0.05)
+
+
+def test_chime_at_the_end_of_the_stream_is_reported(tmp_path):
+    offsets = detect(tmp_path, 9.0, [2.0, 6.3, 8.68])
+    assert len(offsets) == 3
+    assert np.allclose(offsets[:2], [2.0, 6.3], atol=0.05)
+    assert abs(offsets[2] - 8.68) < 0.1
+
+
+def test_sound_matches_stop_a_script_through_the_shiny_detector(tmp_path):
+    reference = write_wav(tmp_path / "reference.wav", chime())
+    stream = write_wav(tmp_path / "stream.wav", recording(9.0, [2.0, 6.3]))
+    # as macro.py wires --detect-sound without --detect-shiny: no indicators, only relayed matches
+    shiny_detector = ShinyDetector(frame_grabber=None, indicators=())
+    clips = []
+    shiny_detector.on_detect(clips.append)
+    detector = AudioDetector(WavSource(stream), reference)
+    detector.on_detect(lambda detection: shiny_detector.report(
+        ShinyDetection("sound", 0, detection.timestamp, detection.score)))
+    detector.run()
+
+    assert len(detector.events) == 2
+    # the second chime arrives while the first is still pending reset()
+    assert [clip.timestamp for clip in clips] == [detector.events[0].timestamp]
+    with pytest.raises(ShinyFound):
+        shiny_detector.check()
+    assert shiny_detector.detection.indicator == "sound"
+
+
+def test_alsa_capture_without_pyalsaaudio_names_the_extra(monkeypatch):
+    monkeypatch.setattr(audio, "alsaaudio", None)
+    with pytest.raises(RuntimeError, match="'audio' extra"):
+        AlsaSource()
@@ -0,0 +1,76 @@
+import numpy as np
+
+from ns_shiny_hunter.calibration import calibrate, calibrate_indicator
+from ns_shiny_hunter.frame import SimpleFrameProcessor, SimpleReferenceFrame
+from ns_shiny_hunter.shiny import ShinyIndicator
+
+# 3000 values, so every differing value adds 1/30 of a percent
+SHAPE = (10, 100, 3)
+
+
+def capture(differing: int) -> np.ndarray:
+    frame = np.zeros(SHAPE, dtype=np.uint8)
+    frame.reshape(-1)[:differing] = 255
+    return frame
+
+
+def reference() -> SimpleReferenceFrame:
+    processor = SimpleFrameProcessor(0, 0, SHAPE[1], SHAPE[0], color_space=None, blur_params=None,
+                                     threshold_params=None)
+    return SimpleReferenceFrame(np.zeros(SHAPE, dtype=np.uint8), processor, threshold=2.5)
+
+
+def test_proposal_separates_a_narrow_margin():
+    calibration = calibrate("narrow", reference(), [capture(0), capture(91)], [capture(92), capture(300)])
+
+    worst_positive = calibration.positives.max
+    best_negative = calibration.negatives.min
+    assert best_negative - worst_positive < 0.05
+    assert worst_positive < calibration.proposed_threshold <= best_negative
+
+
+def test_proposal_is_rounded_when_the_margin_allows():
+    calibration = calibrate("wide", reference(), [capture(30)], [capture(300)])
+
+    assert calibration.proposed_threshold == 5.5
+    assert calibration.threshold == 2.5
+
+
+def test_positives_only_proposal_keeps_its_headroom():
+    calibration = calibrate("positives", reference(), [capture(91)], [])
+
+    assert calibration.proposed_threshold == 4.6
+    assert calibration.proposed_threshold > calibration.positives.max * 1.5
+
+
+def lit(pixels: int) -> np.ndarray:
+    frame = np.zeros(SHAPE, dtype=np.uint8)
+    frame.reshape(-1, 3)[:pixels] = 255
+    return frame
+
+
+def indicator(relative: bool) -> ShinyIndicator:
+    # 1000 pixels, so every lit pixel adds 0.001 to the share
+    return ShinyIndicator("white", 0, 0, SHAPE[1], SHAPE[0], (0, 0, 200), (180, 60, 255),
+                          min_fraction=0.01, relative=relative, stride=1)
+
+
+def test_indicator_proposal_sits_above_the_negatives():
+    calibration = calibrate_indicator(indicator(relative=False), [lit(40), lit(60)], [lit(0), lit(10)])
+
+    assert calibration.margin == 0.03
+    assert calibration.proposed_threshold == 0.025
+    assert calibration.name == "shiny.white"
+
+
+def test_relative_indicator_is_scored_above_its_baseline():
+    calibration = calibrate_indicator(indicator(relative=True), [lit(70)], [lit(30)], [lit(20), lit(25), lit(100)])
+
+    assert np.isclose(calibration.positives.min, 0.045)
+    assert np.isclose(calibration.negatives.max, 0.005)
+
+
+def test_negatives_only_indicator_proposal_keeps_its_headroom():
+    calibration = calibrate_indicator(indicator(relative=False), [], [lit(3)])
+
+    assert calibration.proposed_threshold == 0.005
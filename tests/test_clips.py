@@ -0,0 +1,37 @@
+import cv2
+import pytest
+
+from conftest import FPS, HEIGHT, WIDTH
+from ns_shiny_hunter.clips import ClipRecorder
+from ns_shiny_hunter.frame_grabber import FrameGrabber
+from ns_shiny_hunter.replay import ReplayCapture
+
+
+def test_recorder_requires_lazy_frames(clip_path):
+    frame_grabber = FrameGrabber(ReplayCapture(clip_path), WIDTH, HEIGHT, imshow=False)
+    try:
+        with pytest.raises(ValueError, match="lazy_decode"):
+            ClipRecorder(frame_grabber)
+    finally:
+        frame_grabber.video_capture.release()
+
+
+def test_triggered_clip_holds_the_buffered_jpegs(clip_path, tmp_path):
+    directory = tmp_path / "clips"
+    with FrameGrabber(ReplayCapture(clip_path, loop=True), WIDTH, HEIGHT, imshow=False, lazy_decode=True) as grabber:
+        with ClipRecorder(grabber, seconds=0.5, directory=str(directory)) as recorder:
+            assert grabber.next_frame(0, timeout=5) is not None
+            while grabber.captured_frame.timestamp - grabber.captured_frames[0].timestamp < 0.5:
+                assert grabber.next_frame(grabber.seq, timeout=5) is not None
+            with recorder.lock:
+                buffered = list(recorder.frames)
+            path = recorder.trigger(name="lead-up.avi").result(timeout=30)
+
+    assert all(isinstance(jpeg, bytes) for _, jpeg in buffered)
+    assert buffered[-1][0] - buffered[0][0] <= 0.5
+    capture = cv2.VideoCapture(path)
+    try:
+        assert capture.get(cv2.CAP_PROP_FRAME_COUNT) >= len(buffered) >= FPS * 0.4
+        assert (capture.get(cv2.CAP_PROP_FRAME_WIDTH), capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (WIDTH, HEIGHT)
+    finally:
+        capture.release()
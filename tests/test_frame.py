@@ -0,0 +1,154 @@
+import pickle
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.frame import (
+    PREPARED_FRAME_CACHE,
+    CompositeReferenceFrame,
+    ReferenceFrameEnum,
+    SimpleFrameProcessor,
+    SimpleReferenceFrame,
+    change_gate_stats,
+)
+
+FRAMES_DIR = Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za" / "frames"
+
+
+def load(name: str) -> np.ndarray:
+    return cv2.imread(str(FRAMES_DIR / name))
+
+
+def test_uncompiled_callers_own_their_prepared_roi():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    reference = SimpleReferenceFrame.create_from_frame(load("open-map.jpg"), processor)
+    first = load("overworld-day.jpg")
+    second = load("overworld-night.jpg")
+    PREPARED_FRAME_CACHE.clear()
+
+    reference.get_percent_match(first)
+    prepared = processor.prepare_frame(first)
+    expected = prepared.copy()
+    # the compiled processor prepares the next frame into its scratch buffers
+    reference.get_percent_match(second)
+
+    assert np.array_equal(prepared, expected)
+
+
+def test_compiled_buffers_are_per_thread():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    compiled = {}
+
+    def compile_in_thread(name: str) -> None:
+        compiled[name] = processor.compile()
+
+    threads = [threading.Thread(target=compile_in_thread, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert compiled["a"] is not compiled["b"]
+    assert compiled["a"].key != compiled["b"].key
+    assert processor.compile() is processor.compile()
+
+
+def test_threads_matching_one_reference_agree_with_a_single_thread():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    reference = SimpleReferenceFrame.create_from_frame(load("open-map.jpg"), processor)
+    frames = [load(name) for name in ("open-map.jpg", "overworld-day.jpg", "overworld-night.jpg")]
+    expected = [reference._get_percent_match(frame) for frame in frames]
+    results = {}
+
+    def match(index: int) -> None:
+        results[index] = [reference._get_percent_match(frames[(index + i) % len(frames)]) for i in range(300)]
+
+    threads = [threading.Thread(target=match, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for index, scores in results.items():
+        assert scores == [expected[(index + i) % len(frames)] for i in range(300)]
+
+
+def test_reference_pickles_without_its_scratch_buffers():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    reference = SimpleReferenceFrame.create_from_frame(load("open-map.jpg"), processor)
+    frame = load("overworld-day.jpg")
+    score = reference.get_percent_match(frame)
+
+    restored = pickle.loads(pickle.dumps(reference))
+
+    assert restored.scratch.compiled_processor is None
+    assert restored.get_percent_match(frame) == score
+
+
+def test_change_gate_sees_a_one_pixel_change():
+    processor = SimpleFrameProcessor(100, 100, 200, 50, blur_params=None, threshold_params=None)
+    frame = load("overworld-day.jpg")
+    reference = SimpleReferenceFrame.create_from_frame(frame, processor)
+    assert reference.get_percent_match(frame) == 0
+
+    changed = frame.copy()
+    changed[101, 101] = 255 - changed[101, 101]
+    score = reference.get_percent_match(changed)
+
+    assert score == reference._get_percent_match(changed) > 0
+    assert reference.change_gate.skips == 0
+    assert reference.get_percent_match(changed.copy()) == score
+    assert reference.change_gate.skips == 1
+
+
+def test_change_gate_never_serves_a_score_of_another_roi():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    reference = SimpleReferenceFrame.create_from_frame(load("open-map.jpg"), processor)
+    frames = [load(name) for name in ("open-map.jpg", "overworld-day.jpg", "overworld-night.jpg")]
+    expected = [reference._get_percent_match(frame) for frame in frames]
+    mismatches = []
+
+    def match(index: int) -> None:
+        for i in range(300):
+            j = (index + i // 2) % len(frames)
+            if reference.get_percent_match(frames[j]) != expected[j]:
+                mismatches.append(j)
+
+    threads = [threading.Thread(target=match, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not mismatches
+    assert reference.change_gate.skips > 0
+
+
+def test_references_can_opt_out_of_change_detection():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    reference = SimpleReferenceFrame(processor.prepare_frame(load("open-map.jpg")).copy(), processor,
+                                     detect_changes=False)
+
+    assert reference.change_gate is None
+
+
+def test_change_gate_stats_cover_every_gated_reference():
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    template = processor.prepare_frame(load("open-map.jpg")).copy()
+
+    class Screens(ReferenceFrameEnum):
+        SINGLE = SimpleReferenceFrame(template, processor)
+        EITHER = CompositeReferenceFrame(CompositeReferenceFrame.Behavior.OR, (
+            SimpleReferenceFrame(template, processor),
+            SimpleReferenceFrame(template, processor, detect_changes=False),
+        ))
+
+    Screens.EITHER.get_percent_match(load("overworld-day.jpg"))
+    stats = change_gate_stats()
+
+    assert {"Screens.SINGLE", "Screens.EITHER[0]"} <= stats.keys()
+    assert "Screens.EITHER[1]" not in stats
+    assert stats["Screens.EITHER[0]"]["checks"] == 1
+    assert change_gate_stats(Screens).keys() == {"Screens.SINGLE", "Screens.EITHER[0]"}
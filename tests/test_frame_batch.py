@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import cv2
+
+from ns_shiny_hunter.frame import LoggingReferenceFrame, SimpleFrameProcessor, SimpleReferenceFrame
+from ns_shiny_hunter.frame_batch import ReferenceFrameBatch
+
+FRAMES_DIR = Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za" / "frames"
+
+
+def test_batched_logging_references_log_like_single_checks(capsys):
+    frame = cv2.imread(str(FRAMES_DIR / "open-map.jpg"))
+    processor = SimpleFrameProcessor(100, 100, 200, 50)
+    logging = LoggingReferenceFrame("OPEN_MAP", SimpleReferenceFrame.create_from_frame(frame, processor))
+
+    expected = logging.matches(frame)
+    single = capsys.readouterr().out
+    batch = ReferenceFrameBatch((logging,))
+    assert batch.matches(frame) == {logging: expected}
+    batched = capsys.readouterr().out
+    percent_matches = batch.get_percent_matches(frame)
+
+    assert single == batched == "Percent match for OPEN_MAP: 0.0\nMatches for OPEN_MAP: True\n"
+    assert percent_matches == {logging: 0.0}
+    assert capsys.readouterr().out == "Percent match for OPEN_MAP: 0.0\n"
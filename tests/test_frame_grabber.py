@@ -0,0 +1,118 @@
+import time
+
+import numpy as np
+import pytest
+
+from conftest import BRIGHTNESS, FPS, HEIGHT, WIDTH, read_clip, solid_frame
+from ns_shiny_hunter.frame import SimpleFrameProcessor, SimpleReferenceFrame
+from ns_shiny_hunter.frame_grabber import FrameGrabber
+from ns_shiny_hunter.replay import ReplayCapture
+
+PROCESSOR = SimpleFrameProcessor(WIDTH // 4, HEIGHT // 4, WIDTH // 2, HEIGHT // 2, blur_params=None,
+                                 threshold_params=None)
+
+
+class Screens:
+    """References for the dark and bright halves of the generated clip, and one matching neither"""
+
+    def __init__(self, clip_path: str):
+        frames = read_clip(clip_path)
+        self.dark = SimpleReferenceFrame.create_from_frame(frames[0], PROCESSOR)
+        self.bright = SimpleReferenceFrame.create_from_frame(frames[-1], PROCESSOR)
+        self.never = SimpleReferenceFrame.create_from_frame(solid_frame(120), PROCESSOR)
+
+
+@pytest.fixture
+def screens(clip_path) -> Screens:
+    return Screens(clip_path)
+
+
+@pytest.fixture
+def grabber(clip_path):
+    with FrameGrabber(ReplayCapture(clip_path, loop=True), WIDTH, HEIGHT, imshow=False, buffer_size=3) as grabber:
+        yield grabber
+
+
+def brightness(image: np.ndarray) -> int:
+    """The clip brightness a decoded frame was written with"""
+    return min(BRIGHTNESS, key=lambda value: abs(value - image.mean()))
+
+
+def test_wait_times_out_without_a_match(grabber, screens):
+    start = time.monotonic()
+    assert grabber.wait_for(screens.never, timeout=0.3) is None
+    assert 0.3 <= time.monotonic() - start < 1.0
+    assert grabber.wait_for(screens.never, timeout=0) is None
+
+
+def test_wait_for_any_returns_the_first_matching_reference(grabber, screens):
+    match = grabber.wait_for_any((screens.never, screens.bright), timeout=5)
+    assert match.reference is screens.bright
+    assert brightness(match.frame) == BRIGHTNESS[-1]
+
+
+def test_wait_only_judges_frames_captured_after(grabber, screens):
+    dark = grabber.wait_for(screens.dark, timeout=5)
+    # the dark screen is on; frames captured before `after` must not satisfy the wait
+    after = dark.timestamp + 0.5 / FPS
+    match = grabber.wait_for_any((screens.dark, screens.bright), timeout=5, after=after)
+    assert match.timestamp > after
+    assert match.captured.seq > dark.captured.seq
+
+
+def test_wait_returns_none_when_capture_stops(clip_path, screens):
+    with FrameGrabber(ReplayCapture(clip_path, speed=4), WIDTH, HEIGHT, imshow=False) as grabber:
+        start = time.monotonic()
+        assert grabber.wait_for(screens.never) is None
+        assert grabber.running.is_set()
+        assert time.monotonic() - start < 5
+
+
+def test_frames_are_tagged_with_consecutive_seqs_and_capture_timestamps(grabber):
+    first = grabber.next_frame(0, timeout=5)
+    captured = [first]
+    while len(captured) < 10:
+        captured.append(grabber.frame_after(seq=captured[-1].seq, timeout=5))
+
+    assert [c.seq for c in captured] == list(range(first.seq, first.seq + 10))
+    intervals = np.diff([c.timestamp for c in captured])
+    assert np.allclose(intervals, 1 / FPS, atol=1e-3)
+    assert all(c.timestamp <= time.monotonic() for c in captured)
+
+
+def test_frame_after_a_timestamp_is_the_first_captured_after_it(grabber):
+    newest = grabber.next_frame(0, timeout=5)
+    after = newest.timestamp + 1.5 / FPS
+    captured = grabber.frame_after(timestamp=after, timeout=5)
+
+    assert captured.timestamp > after
+    assert captured.timestamp - after <= 1 / FPS + 1e-3
+    assert captured.seq == newest.seq + 2
+
+
+def test_ring_slot_is_reused_after_buffer_size_plus_one_frames(grabber):
+    first = grabber.next_frame(0, timeout=5)
+    assert grabber.is_current(first)
+    copy = grabber.copy(first)
+    assert copy is not None and copy.flags.writeable
+    with pytest.raises(ValueError):
+        first.image[0, 0] = 0
+
+    # buffer_size=3, so the ring has four slots
+    reuser = grabber.frame_after(seq=first.seq + 3, timeout=5)
+
+    assert reuser.seq == first.seq + 4
+    assert np.shares_memory(reuser.image, first.image)
+    assert not grabber.is_current(first)
+    assert grabber.copy(first) is None
+    assert grabber.is_current(reuser)
+
+
+def test_frames_are_copies_that_outlive_the_ring(grabber):
+    grabber.next_frame(0, timeout=5)
+    captured = grabber.captured_frames
+    frames = grabber.frames
+
+    assert 0 < len(frames) <= 3
+    assert all(frame.flags.writeable for frame in frames)
+    assert not any(np.shares_memory(frame, c.image) for frame in frames for c in captured)
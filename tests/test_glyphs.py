@@ -0,0 +1,44 @@
+import json
+
+from ns_shiny_hunter.glyphs import UNKNOWN, GlyphClassifier, read_labelled_text
+from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames import SELL_TEXT_FIELDS, SELL_TEXT_LABELS
+
+TRAINING = {"selected-item.jpg", "sell-accept-offer.jpg"}
+
+
+def split_labelled_rois() -> tuple[list, list]:
+    """(field, ROI, text) of the shipped labelled captures, split into training and held-out sets"""
+    names = json.loads(SELL_TEXT_LABELS.read_text())
+    training, held_out = [], []
+    for field, captures in read_labelled_text(SELL_TEXT_LABELS).items():
+        # read_labelled_text lists each field's captures sorted by file name
+        for name, (frame, text) in zip(sorted(names[field]), captures):
+            sample = (field, SELL_TEXT_FIELDS[field].processor.prepare_frame(frame), text)
+            (training if name in TRAINING else held_out).append(sample)
+    return training, held_out
+
+
+def test_reads_held_out_captures_of_the_fixed_font_fields():
+    training, held_out = split_labelled_rois()
+    classifier = GlyphClassifier.train((roi, text) for _, roi, text in training)
+
+    reads = {(field, text): classifier.read(roi) for field, roi, text in held_out}
+
+    assert reads == {
+        ("item-name", "Poké Ball"): "Poké Ball",
+        ("item-name", "Nugget"): "Nugget",
+        # no 5 was trained on
+        ("item-quantity", "5"): UNKNOWN,
+        # a field none of the training captures were labelled for
+        ("quantity-to-sell", "333"): "333",
+    }
+
+
+def test_saved_templates_read_the_same(tmp_path):
+    training, _ = split_labelled_rois()
+    classifier = GlyphClassifier.train((roi, text) for _, roi, text in training)
+    classifier.save(tmp_path / "glyphs.npz")
+
+    loaded = GlyphClassifier.load(tmp_path / "glyphs.npz")
+
+    assert [loaded.read(roi) for _, roi, _ in training] == [text for _, _, text in training]
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+from loguru import logger
+
+from ns_shiny_hunter import mjpeg
+from ns_shiny_hunter.mjpeg import decode, decode_roi
+
+
+@pytest.fixture
+def warnings(monkeypatch):
+    monkeypatch.setattr(mjpeg, "_turbo_jpeg", None)
+    monkeypatch.setattr(mjpeg, "_turbo_jpeg_unavailable", False)
+    messages = []
+    handler = logger.add(messages.append, level="WARNING", format="{message}")
+    yield messages
+    logger.remove(handler)
+
+
+def jpeg() -> bytes:
+    image = np.zeros((64, 96, 3), dtype=np.uint8)
+    image[16:48, 32:64] = 255
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_missing_pyturbojpeg_falls_back_with_one_warning(monkeypatch, warnings):
+    monkeypatch.setattr(mjpeg, "TurboJPEG", None)
+    data = jpeg()
+
+    roi = decode_roi(data, 32, 16, 64, 48)
+    decode_roi(data, 0, 0, 32, 32, scale=2)
+
+    assert np.array_equal(roi, decode(data)[16:48, 32:64])
+    assert len(warnings) == 1
+    assert "'jpeg' extra" in warnings[0]
+
+
+def test_missing_libturbojpeg_falls_back_with_one_warning(monkeypatch, warnings):
+    class MissingLibrary:
+        def __init__(self):
+            # what PyTurboJPEG raises when it cannot find the library
+            raise RuntimeError("Unable to locate turbojpeg library automatically.")
+
+    monkeypatch.setattr(mjpeg, "TurboJPEG", MissingLibrary)
+
+    assert mjpeg.turbo_jpeg() is None
+    assert mjpeg.turbo_jpeg() is None
+    assert len(warnings) == 1
+    assert "libturbojpeg could not be loaded" in warnings[0]
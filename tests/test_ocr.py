@@ -0,0 +1,63 @@
+import numpy as np
+
+from ns_shiny_hunter.frame import SimpleFrameProcessor
+from ns_shiny_hunter.legends_za.scripts.sushi_high_roller.frames import ATTACK_FRAME_PROCESSOR, ATTACK_OCR_FIELD
+from ns_shiny_hunter.ocr import OcrEngine, OcrField, STITCH_PADDING, binarize, stitch
+
+
+class RecordingEngine(OcrEngine):
+    """Records what would be sent to tesseract instead of running it"""
+
+    def __init__(self):
+        super().__init__()
+        self.single: list[tuple[np.ndarray, OcrField]] = []
+        self.stitched: list[list[OcrField]] = []
+
+    def recognize(self, binary, field):
+        self.single.append((binary, field))
+        return "single"
+
+    def recognize_stitched(self, binaries, fields):
+        self.stitched.append(fields)
+        return ["stitched"] * len(fields)
+
+
+def screen() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+
+
+def test_attack_field_reads_the_raw_roi():
+    frame = screen()
+    engine = RecordingEngine()
+    assert engine.read(frame, ATTACK_OCR_FIELD) == "single"
+    [(image, _)] = engine.single
+    np.testing.assert_array_equal(image, ATTACK_FRAME_PROCESSOR.prepare_frame(frame))
+
+
+def test_raw_fields_are_not_stitched():
+    binarized = [OcrField(SimpleFrameProcessor(0, y, 100, 20, threshold_params=None)) for y in (0, 40)]
+    engine = RecordingEngine()
+    texts = engine.read_all(screen(), {"a": binarized[0], "b": binarized[1], "attack": ATTACK_OCR_FIELD})
+    assert texts == {"a": "stitched", "b": "stitched", "attack": "single"}
+    assert engine.stitched == [binarized]
+
+
+def text_roi(light_text: bool) -> np.ndarray:
+    roi = np.zeros((20, 100), dtype=np.uint8)
+    roi[8:12, 10:40] = 255
+    return roi if light_text else 255 - roi
+
+
+def test_binarize_gives_dark_text_on_white_for_either_polarity():
+    for light_text in (True, False):
+        binary = binarize(text_roi(light_text))
+        assert binary[0, 0] == 255
+        assert binary[10, 20] == 0
+
+
+def test_stitched_bands_match_single_reads():
+    binaries = [binarize(text_roi(True)), binarize(text_roi(False))]
+    image, bands = stitch(binaries)
+    for binary, (top, bottom) in zip(binaries, bands):
+        np.testing.assert_array_equal(image[top:bottom, STITCH_PADDING:STITCH_PADDING + binary.shape[1]], binary)
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.frame_batch import ReferenceFrameBatch
+from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
+from ns_shiny_hunter.preview import Preview
+
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+FRAMES_DIR = Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za" / "frames"
+
+
+def test_overlays_show_the_batch_scores_of_the_last_frame():
+    frame = cv2.imread(str(FRAMES_DIR / "open-map.jpg"))
+    open_map = LegendsZAReferenceFrames.OPEN_MAP
+    travel_here = LegendsZAReferenceFrames.TRAVEL_HERE
+    batch = ReferenceFrameBatch((open_map, travel_here))
+    assert batch.first_match(frame) is open_map
+
+    preview = Preview(frame_grabber=None)
+    try:
+        assert preview.draw_overlays(frame) is frame
+        preview.show(batch)
+        drawn = preview.draw_overlays(frame)
+    finally:
+        preview.snapshot_writer.close()
+
+    def outline(reference) -> tuple[int, ...]:
+        processor = reference.value.frame_processor
+        return tuple(drawn[processor.y2, (processor.x1 + processor.x2) // 2])
+
+    assert outline(open_map) == GREEN
+    assert outline(travel_here) == RED
+    assert not np.shares_memory(drawn, frame)
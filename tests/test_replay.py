@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+
+from conftest import BRIGHTNESS, FPS
+from ns_shiny_hunter.replay import ReplayCapture
+
+
+def read_timestamps(replay: ReplayCapture, count: int) -> list[float]:
+    timestamps = []
+    for _ in range(count):
+        success, _ = replay.read()
+        assert success
+        # a paced frame is never released before it is due
+        assert time.monotonic() >= replay.timestamp
+        timestamps.append(replay.timestamp)
+    return timestamps
+
+
+def test_frames_are_released_at_their_recorded_pace(clip_path):
+    replay = ReplayCapture(clip_path)
+    start = time.monotonic()
+    timestamps = read_timestamps(replay, len(BRIGHTNESS))
+
+    assert np.allclose(np.diff(timestamps), 1 / FPS, atol=1e-3)
+    assert time.monotonic() - start >= (len(BRIGHTNESS) - 1) / FPS
+    assert replay.read() == (False, None)
+    assert replay.finished
+    replay.release()
+
+
+def test_speed_scales_the_pace(clip_path):
+    replay = ReplayCapture(clip_path, speed=2)
+    timestamps = read_timestamps(replay, 6)
+
+    assert np.allclose(np.diff(timestamps), 1 / FPS / 2, atol=1e-3)
+    replay.release()
+
+
+def test_looped_replay_keeps_its_pace_across_the_loop(clip_path):
+    replay = ReplayCapture(clip_path, speed=4, loop=True)
+    timestamps = read_timestamps(replay, len(BRIGHTNESS) + 5)
+
+    assert replay.loops == 1
+    assert not replay.finished
+    assert np.allclose(np.diff(timestamps), 1 / FPS / 4, atol=1e-3)
+    replay.release()
+
+
+def test_seek_continues_from_the_requested_frame_without_waiting(clip_path):
+    replay = ReplayCapture(clip_path)
+    read_timestamps(replay, 2)
+    replay.seek(frame=len(BRIGHTNESS) - 1)
+    success, frame = replay.read()
+
+    assert success
+    assert abs(frame.mean() - BRIGHTNESS[-1]) < 5
+    assert abs(replay.timestamp - time.monotonic()) < 0.01
+    replay.release()
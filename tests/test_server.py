@@ -0,0 +1,46 @@
+from concurrent import futures
+
+import grpc
+
+from ns_controller.pb.ns_controller_pb2 import ControllerState
+from ns_controller.pb.ns_controller_pb2_grpc import NsControllerStub, add_NsControllerServicer_to_server
+from ns_controller.server import NsControllerServicerImpl
+from ns_controller.trace import TraceRecord, replay_stream
+
+
+class RecordingController:
+    """Stands in for the USB gadget, remembering every state it was given"""
+
+    def __init__(self):
+        self.states: list[ControllerState] = []
+
+    @property
+    def state(self) -> ControllerState:
+        return self.states[-1] if self.states else ControllerState()
+
+    @state.setter
+    def state(self, state: ControllerState) -> None:
+        self.states.append(state)
+
+
+class RecordingServicer(NsControllerServicerImpl):
+    def __init__(self):
+        self.controller = RecordingController()
+
+
+def test_stream_state_applies_every_state_and_acks_once():
+    servicer = RecordingServicer()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    add_NsControllerServicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            records = [TraceRecord(i * 1_000_000, 0, 1 << i, 0.0, 0.0, 0.0, 0.0) for i in range(3)]
+            ack = replay_stream(records, NsControllerStub(channel), speed=100)
+    finally:
+        server.stop(None)
+
+    assert ack.success
+    assert ack.previous_state == ControllerState()
+    assert [state.buttons for state in servicer.controller.states] == [1, 2, 4]
@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ns_shiny_hunter.calibration import calibrate_indicator
+from ns_shiny_hunter.frame import Frame
+from ns_shiny_hunter.frame_grabber import CapturedFrame
+from ns_shiny_hunter.legends_za.shiny import LEGENDS_ZA_SHINY_INDICATORS, SHINY_ICON, SPARKLE
+from ns_shiny_hunter.shiny import ShinyDetector, ShinyIndicator
+
+# hue 20, full saturation and value
+YELLOW = (0, 170, 255)
+
+LEGENDS_ZA = Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za"
+# real captures of the scenes the reset scripts watch, none of them showing a shiny
+BASELINE = ["scripts/bench_reset/frames/overworld-day.jpg", "scripts/bench_reset/frames/overworld-night.jpg",
+            "scripts/bench_reset/frames/hang-out-here.jpg", "scripts/bench_reset/frames/what-a-nice-bench.jpg"]
+NEGATIVES = ["frames/overworld-day.jpg", "frames/overworld-night.jpg", "frames/press-a-to-enter.jpg",
+             "frames/press-a-to-talk.jpg", "scripts/wz16/frames/press-a-to-enter.jpg"]
+
+
+class CurrentFrames:
+    """Stands in for a FrameGrabber whose frames are never overwritten"""
+
+    def is_current(self, captured: CapturedFrame) -> bool:
+        return True
+
+
+def sparkle() -> ShinyIndicator:
+    return ShinyIndicator("sparkle", 0, 0, 100, 100, (10, 100, 200), (40, 255, 255),
+                          min_fraction=0.05, max_fraction=0.5, relative=True, stride=1)
+
+
+def frame(seq: int, lit_rows: int) -> CapturedFrame:
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    image[:lit_rows] = YELLOW
+    return CapturedFrame(seq, seq / 30, image)
+
+
+def run(detector: ShinyDetector, lit_rows: list[int]) -> list[int]:
+    detections = (detector.update(frame(seq, rows)) for seq, rows in enumerate(lit_rows, 1))
+    return [detection.seq for detection in detections if detection is not None]
+
+
+def test_brief_sparkle_is_reported_once_faded():
+    detector = ShinyDetector(CurrentFrames(), [sparkle()])
+    # 60 plain frames, a 10-frame sparkle lighting 20% of the region, then plain again
+    assert run(detector, [0] * 60 + [20] * 10 + [0] * 20) == [63]
+
+
+def test_lasting_scene_change_is_not_a_sparkle():
+    detector = ShinyDetector(CurrentFrames(), [sparkle()])
+    # the scene brightens for good, as on entering a lit building
+    assert run(detector, [0] * 60 + [20] * 300) == []
+    # and a sparkle on top of the brighter scene is still seen
+    assert run(detector, [40] * 10 + [20] * 20) != []
+
+
+def load(name: str) -> Frame:
+    return cv2.imread(str(LEGENDS_ZA / name))
+
+
+def with_sparkles(image: Frame) -> Frame:
+    """
+    A synthetic positive: no shiny has been captured yet, so white-gold star bursts
+    are drawn into the field of view of a real capture
+    """
+    image = image.copy()
+    for x, y in ((640, 200), (700, 160), (590, 240), (760, 220), (660, 300), (720, 270), (610, 150), (780, 180)):
+        cv2.circle(image, (x, y), 10, (190, 235, 255), -1)
+    return image
+
+
+def with_shiny_icon(image: Frame) -> Frame:
+    """A synthetic positive: a red star beside the locked-on name of a real capture"""
+    image = image.copy()
+    star = np.array([(640, 24), (645, 36), (658, 36), (648, 44), (652, 57), (640, 49), (628, 57), (632, 44),
+                     (622, 36), (635, 36)], dtype=np.int32)
+    cv2.fillPoly(image, [star], (20, 20, 230))
+    return image
+
+
+def run_images(detector: ShinyDetector, images: list[Frame]) -> list[int]:
+    detections = (detector.update(CapturedFrame(seq, seq / 30, image)) for seq, image in enumerate(images, 1))
+    return [detection.seq for detection in detections if detection is not None]
+
+
+def test_real_captures_without_a_shiny_are_not_reported():
+    detector = ShinyDetector(CurrentFrames(), LEGENDS_ZA_SHINY_INDICATORS)
+    scenes = [load(name) for name in BASELINE + NEGATIVES]
+
+    assert run_images(detector, [image for image in scenes for _ in range(30)]) == []
+
+
+def test_shipped_sparkle_threshold_clears_the_real_negatives():
+    calibration = calibrate_indicator(SPARKLE, [with_sparkles(load(NEGATIVES[0]))],
+                                      [load(name) for name in NEGATIVES], [load(name) for name in BASELINE])
+
+    assert calibration.negatives.max < SPARKLE.min_fraction <= calibration.positives.min
+    assert calibration.negatives.max * 1.5 <= SPARKLE.min_fraction
+    assert calibrate_indicator(SPARKLE, [], [load(name) for name in NEGATIVES],
+                               [load(name) for name in BASELINE]).proposed_threshold == SPARKLE.min_fraction
+
+
+def test_sparkles_on_a_real_capture_are_reported():
+    detector = ShinyDetector(CurrentFrames(), LEGENDS_ZA_SHINY_INDICATORS)
+    plain = load(BASELINE[0])
+
+    assert run_images(detector, [plain] * 60 + [with_sparkles(plain)] * 10 + [plain] * 20) == [63]
+
+
+def test_shiny_icon_on_a_real_capture_is_reported():
+    detector = ShinyDetector(CurrentFrames(), [SHINY_ICON])
+    plain = load(BASELINE[0])
+    calibration = calibrate_indicator(SHINY_ICON, [with_shiny_icon(plain)], [load(name) for name in NEGATIVES])
+
+    assert calibration.negatives.max == 0
+    assert calibration.positives.min >= SHINY_ICON.min_fraction
+    # confirmed on the third hit; a steady icon keeps confirming until the detector is reset
+    assert run_images(detector, [plain] * 5 + [with_shiny_icon(plain)] * 5)[0] == 8
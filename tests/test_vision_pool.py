@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import cv2
+
+from ns_shiny_hunter import vision_pool
+from ns_shiny_hunter.legends_za.frames import LegendsZAReferenceFrames
+from ns_shiny_hunter.shared_frames import SharedFrameRing
+from ns_shiny_hunter.vision_pool import _run, percent_matches
+
+FRAMES_DIR = Path(__file__).parent.parent / "ns_shiny_hunter" / "legends_za" / "frames"
+
+
+def test_reused_slot_is_scored_afresh(monkeypatch):
+    open_map = cv2.imread(str(FRAMES_DIR / "open-map.jpg"))
+    overworld = cv2.imread(str(FRAMES_DIR / "overworld-day.jpg"))
+    height, width = open_map.shape[:2]
+    ring = SharedFrameRing.create(1, height, width)
+    monkeypatch.setattr(vision_pool, "_shared_ring", ring)
+    references = (LegendsZAReferenceFrames.OPEN_MAP,)
+    try:
+        ring.frames[0][:] = open_map
+        ring.seqs[0] = 1
+        [map_score] = _run(percent_matches, 1, None, (references,))
+
+        # capture wraps around and overwrites the slot in place
+        ring.frames[0][:] = cv2.resize(overworld, (width, height))
+        ring.seqs[0] = 2
+        [overworld_score] = _run(percent_matches, 2, None, (references,))
+        [expected] = percent_matches(ring.frames[0].copy(), references)
+    finally:
+        monkeypatch.undo()
+        ring.close(unlink=True)
+
+    assert overworld_score == expected
+    assert overworld_score != map_score
+    assert overworld_score >= LegendsZAReferenceFrames.OPEN_MAP.value.threshold